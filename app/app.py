@@ -8,14 +8,21 @@ from datetime import datetime
 import json
 import logging
 import io
+import os
+import sys
 import svgwrite
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors as rl_colors
 from reportlab.pdfgen import canvas
-
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging is shared with the main app in oldcode/src
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'oldcode'))
+from src.logs import setup_logging, init_request_logging
 
 app = Flask(__name__)
+app.config.from_pyfile('../config.py')
+setup_logging(app.config)
+init_request_logging(app)
+logger = logging.getLogger(__name__)
 app.secret_key = 'super_secret_key'
 
 def convert_to_metric(value, is_imperial):
@@ -93,7 +100,7 @@ def configure():
                       (name, design_type, json.dumps(dimensions), json.dumps(colors), rod, datetime.now().isoformat()))
             conn.commit()
             conn.close()
-            logging.info(f"Saved design: {name}")
+            logger.info('Saved design: %s', name)
             return redirect(url_for('output', name=name, units=units))
         except ValueError as e:
             flash(f"Error: {e}")
@@ -3,6 +3,19 @@
 # Purpose: Stores secret key and SQLAlchemy settings. Verify against initial assignment (Start → Select → Configure → Output → Designs).
 # Next Step: Ensure DB connection in app.py aligns with this URI.
 
+import os
+
 SECRET_KEY = 'super_secret_key'
 SQLALCHEMY_DATABASE_URI = 'sqlite:///designs.db'
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Logging: JSON lines written by a background thread (oldcode/src/logs.py)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_LEVELS = {  # per-logger overrides, e.g. 'kite_laundry.access': 'WARNING'
+    'werkzeug': 'WARNING',
+    'reportlab': 'WARNING',
+    'PIL': 'WARNING',
+}
+LOG_DEBUG_SAMPLE_EVERY = int(os.environ.get('LOG_DEBUG_SAMPLE_EVERY', 100))  # keep 1 in N DEBUG records per call site
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped, never waited on
+LOG_FILE = os.environ.get('LOG_FILE')  # default: stderr
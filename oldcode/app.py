@@ -1,51 +1,44 @@
-import sqlite3
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response, stream_with_context
 import io
 import json
-import logging
+import math
 import os
+import yaml
+from functools import lru_cache
 from src.render import generate_svg, generate_pdf
-from src.config import design_principles, rod_types
-
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.models import design_principles, rod_types, MAX_DIMENSION, GORE_RANGE, MAX_COLORS, MAX_SEAM_ALLOWANCE, MAX_ROLL_WIDTH
+from src.db import init_db, get_design_by_name, get_design_version, get_latest_designs, list_versions, save_design, rollback_design, diff_versions
+from src.geometry import design_geometry, quantized_geometry, packed_geometry
+from src.cutting import layout_cut_job, generate_dxf, generate_hpgl
+from src.seams import build_cut_job, design_seams, project_seams, plan_cut_panels, estimate_materials
+from src.unfold import unfold_project
+from src.physics import wind_speeds, rank_designs, parse_rating, project_drag_area
+from src.lookbook import generate_lookbook
+from src.palette import get_palette
+from src.imposition import SHEETS, impose, generate_imposition
+from src.storage import get_artifact_store, artifact_key, serve_artifact
+from src.logs import setup_logging, init_request_logging
+from src.admission import AdmissionController, Overloaded
+from config import Config
 
 app = Flask(__name__)
+app.config.from_object(Config)
+setup_logging(app.config)
+init_request_logging(app)
 app.secret_key = 'super_secret_key'
+artifact_store = get_artifact_store(app.config)
+admission = AdmissionController(app.config)
+app.before_request(admission.admit)
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    response = make_response(e.reason, e.status)
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
 # Custom filter for JSON parsing in templates
 app.jinja_env.filters['from_json'] = json.loads
 
-def init_db():
-    conn = sqlite3.connect('designs.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS designs
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  name TEXT NOT NULL,
-                  type TEXT NOT NULL,
-                  dimensions TEXT NOT NULL,
-                  colors TEXT NOT NULL,
-                  rod TEXT,
-                  creation_date TEXT NOT NULL,
-                  unit_label TEXT DEFAULT 'cm')''')
-    c.execute('''PRAGMA table_info(designs)''')
-    columns = [info[1] for info in c.fetchall()]
-    if 'unit_label' not in columns:
-        c.execute('''ALTER TABLE designs ADD COLUMN unit_label TEXT DEFAULT 'cm' ''')
-    c.execute('''UPDATE designs SET unit_label = 'cm' WHERE unit_label IS NULL''')
-    conn.commit()
-    resource_dir = 'projects/resources'
-    if os.path.exists(resource_dir):
-        for yaml_file in os.listdir(resource_dir):
-            if yaml_file.endswith('.yaml'):
-                with open(os.path.join(resource_dir, yaml_file), 'r') as f:
-                    data = yaml.safe_load(f)
-                    if data and 'name' in data and 'type' in data:
-                        c.execute('INSERT OR IGNORE INTO designs (name, type, dimensions, colors, rod, creation_date, unit_label) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                                  (data['name'], data['type'], json.dumps(data.get('dimensions', {})), json.dumps(data.get('colors', [])), data.get('rod', 'none'), data.get('creation_date', datetime.now().isoformat()), 'cm'))
-                    conn.commit()
-    conn.close()
-
 init_db()
 
 def convert_to_metric(value, is_imperial):
@@ -54,6 +47,92 @@ def convert_to_metric(value, is_imperial):
 def convert_to_imperial(value, is_imperial):
     return value / 2.54 if is_imperial else value
 
+def parse_dimensions(design_type, form, is_imperial):
+    """
+    Read and validate the dimension fields of the configure form, converted to metric.
+    Raises ValueError on values outside (0, MAX_DIMENSION] cm, gores outside GORE_RANGE
+    or an outlet larger than the entry.
+    """
+    principle = design_principles[design_type]
+    default_values = principle.get('default_values', {})
+    dimensions = {}
+    for dim in principle['dimensions']:
+        val = convert_to_metric(float(form.get(dim, default_values.get(dim, 0))), is_imperial)
+        if not math.isfinite(val) or not 0 < val <= MAX_DIMENSION:
+            raise ValueError(f'{dim} must be a positive number up to {MAX_DIMENSION} cm.')
+        dimensions[dim] = round(val, 0)
+    if principle['has_gore']:
+        gore = int(form.get('gore', default_values.get('gore', 8 if design_type == 'spinner' else 6)))
+        if not GORE_RANGE[0] <= gore <= GORE_RANGE[1]:
+            raise ValueError(f'Gores must be between {GORE_RANGE[0]} and {GORE_RANGE[1]}.')
+        dimensions['gore'] = gore
+    if principle['has_outlet']:
+        entry_dia = float(form.get('entry_diameter', default_values.get('entry_diameter', 0)))
+        val = float(form.get('outlet_diameter', entry_dia / 4))
+        if not 0 < val <= entry_dia:
+            raise ValueError("Outlet must be smaller than entry.")
+        dimensions['outlet_diameter'] = round(convert_to_metric(val, is_imperial), 0)
+    return dimensions
+
+def parse_mm(args, field, default, maximum):
+    """
+    Read a length in mm from the query string, or default when it is missing.
+    Raises ValueError on values outside (0, maximum] mm.
+    """
+    if field not in args:
+        return default
+    try:
+        val = float(args[field])
+    except ValueError:
+        val = math.nan
+    if not math.isfinite(val) or not 0 < val <= maximum:
+        raise ValueError(f'{field} must be a positive number up to {maximum} mm')
+    return val
+
+def parse_colors(form):
+    """
+    Read color1..color3 of the configure form (empty fields skipped).
+    Raises ValueError when no color is given or one is not a palette or named/hex color.
+    """
+    colors = [c for c in (form.get(f'color{i}', 'red' if i == 1 else '') for i in range(1, MAX_COLORS + 1)) if c]
+    if not colors:
+        raise ValueError('Pick at least one color.')
+    palette = get_palette()
+    for color in colors:
+        if not palette.known(color):
+            raise ValueError(f'Unknown color: {color[:40]}')
+    return colors
+
+def ratio_suggestion(design_type, dimensions):
+    principle = design_principles[design_type]
+    ratio_field = principle['ratio_field']
+    suggested_ratio = principle['suggested_ratio']
+    ratio = dimensions[ratio_field[0]] / dimensions[ratio_field[1]]
+    if abs(ratio - suggested_ratio) > suggested_ratio * 0.2:
+        return f'Suggestion: Optimal {principle["ratio_desc"]} ratio ~{suggested_ratio}:1. Yours is {ratio:.1f}:1.'
+    return None
+
+@lru_cache(maxsize=256)
+def render_preview(design_type, dimension_items, colors, fmt):
+    """
+    Preview payload for a parameter set; memoized because the configure page re-sends
+    the same values while the user types. Arguments are hashable (tuples) for the cache;
+    parse_dimensions bounds the gores, so every cached body stays small. Misses render
+    within the route's admission limits (cache hits skip them).
+    Returns: (body (str or bytes), mimetype)
+    """
+    return admission.guarded(lambda: _preview_payload(design_type, dict(dimension_items), colors, fmt))()
+
+def _preview_payload(design_type, dimensions, colors, fmt):
+    if fmt == 'svg':
+        return generate_svg(design_type, dimensions, list(colors)).getvalue(), 'image/svg+xml'
+    payload = {
+        'dimensions': dimensions,
+        'suggestion': ratio_suggestion(design_type, dimensions),
+        'geometry': quantized_geometry(design_geometry(design_type, dimensions, list(colors))),
+    }
+    return json.dumps(payload, separators=(',', ':')), 'application/json'
+
 @app.route('/', methods=['GET', 'POST'])
 def start():
     if request.method == 'POST':
@@ -83,7 +162,6 @@ def configure():
     dims = design_principles[design_type]['dimensions']
     principle = design_principles[design_type]['description']
     suggested_ratio = design_principles[design_type]['suggested_ratio']
-    ratio_field = design_principles[design_type]['ratio_field']
     ratio_desc = design_principles[design_type]['ratio_desc']
     has_gore = design_principles[design_type]['has_gore']
     has_outlet = design_principles[design_type]['has_outlet']
@@ -91,42 +169,40 @@ def configure():
 
     if request.method == 'POST':
         name = request.form['name']
-        colors = [request.form.get('color1', 'red'), request.form.get('color2', ''), request.form.get('color3', '')]
-        colors = [c for c in colors if c]
         rod = request.form['rod']
-        dimensions = {}
         try:
-            for dim in dims:
-                val = float(request.form.get(dim, default_values.get(dim, 0)))
-                if val <= 0:
-                    raise ValueError
-                dimensions[dim] = round(convert_to_metric(val, is_imperial), 0)
-            if has_gore:
-                dimensions['gore'] = int(request.form.get('gore', default_values.get('gore', 8 if design_type == 'spinner' else 6)))
-            if has_outlet:
-                entry_dia = float(request.form.get('entry_diameter', default_values.get('entry_diameter', 0)))
-                val = float(request.form.get('outlet_diameter', entry_dia / 4))
-                if val > entry_dia:
-                    raise ValueError("Outlet must be smaller than entry.")
-                dimensions['outlet_diameter'] = round(convert_to_metric(val, is_imperial), 0)
-            ratio = dimensions[ratio_field[0]] / dimensions[ratio_field[1]]
-            if abs(ratio - suggested_ratio) > suggested_ratio * 0.2:
-                flash(f'Suggestion: Optimal {ratio_desc} ratio ~{suggested_ratio}:1. Yours is {ratio:.1f}:1.')
-            conn = sqlite3.connect('designs.db')
-            c = conn.cursor()
-            c.execute('INSERT INTO designs (name, type, dimensions, colors, rod, creation_date, unit_label) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                      (name, design_type, json.dumps(dimensions), json.dumps(colors), rod, datetime.now().isoformat(), unit_label))
-            conn.commit()
-            conn.close()
-            logging.info(f'Saved design: {name}')
+            colors = parse_colors(request.form)
+            dimensions = parse_dimensions(design_type, request.form, is_imperial)
+            suggestion = ratio_suggestion(design_type, dimensions)
+            if suggestion:
+                flash(suggestion)
+            version, created = save_design(name, design_type, dimensions, colors, rod, unit_label)
+            if not created:
+                flash(f'No changes: {name} is still version {version}.')
             return redirect(url_for('output', name=name, units=units))
         except ValueError as e:
             flash(f'Error: {e}')
 
     return render_template('configure.html', units=units, unit_label=unit_label, type=design_type,
-                           dims=dims, colors_list=['red', 'blue', 'green', 'yellow', 'black', 'white'], rod_types=rod_types, principle=principle,
+                           dims=dims, colors_list=[c.name for c in get_palette().available('icarex')], rod_types=rod_types, principle=principle,
                            suggested_ratio=suggested_ratio, ratio_desc=ratio_desc, has_gore=has_gore, has_outlet=has_outlet, default_values=default_values)
 
+@app.route('/preview', methods=['GET', 'POST'])
+def preview():
+    # Side-effect free: no DB write, no flash, so it can be called on every keystroke
+    values = request.values
+    design_type = values.get('type')
+    fmt = values.get('format', 'json')
+    if design_type not in design_principles or fmt not in ('json', 'svg'):
+        return jsonify({'error': 'Invalid design type or format.'}), 400
+    try:
+        colors = tuple(parse_colors(values))
+        dimensions = parse_dimensions(design_type, values, values.get('units', 'metric') == 'imperial')
+        body, mimetype = render_preview(design_type, tuple(sorted(dimensions.items())), colors, fmt)
+    except (ValueError, ZeroDivisionError) as e:
+        return jsonify({'error': str(e) or 'Dimensions must be positive numbers.'}), 400
+    return app.response_class(body, mimetype=mimetype)
+
 @app.route('/output')
 def output():
     name = request.args.get('name')
@@ -134,11 +210,7 @@ def output():
     is_imperial = (units == 'imperial')
     unit_label = 'in' if is_imperial else 'cm'
 
-    conn = sqlite3.connect('designs.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM designs WHERE name = ? ORDER BY id DESC LIMIT 1', (name,))
-    design = c.fetchone()
-    conn.close()
+    design = get_design_by_name(name)
 
     if not design:
         flash('Design not found.')
@@ -162,19 +234,39 @@ def output():
 @app.route('/svg')
 def get_svg():
     name = request.args.get('name')
-    conn = sqlite3.connect('designs.db')
-    c = conn.cursor()
-    c.execute('SELECT type, dimensions, colors FROM designs WHERE name = ? ORDER BY id DESC LIMIT 1', (name,))
-    design = c.fetchone()
-    conn.close()
+    design = get_design_by_name(name)
     if not design:
         return 'Not found', 404
-    design_type, dims_json, colors_json = design
+    design_type, dims_json, colors_json = design[2], design[3], design[4]
     dimensions = json.loads(dims_json)
     colors = json.loads(colors_json)
-    svg_io = generate_svg(design_type, dimensions, colors)
-    svg_io.seek(0)
-    return send_file(svg_io, mimetype='image/svg+xml', download_name=f'{name}.svg')
+    key = artifact_key('svg', design_type, dimensions, colors, get_palette().version)
+    return serve_artifact(artifact_store, key, f'{name}.svg', admission.guarded(lambda: generate_svg(design_type, dimensions, colors)), tag=f'svg:{name}')
+
+@app.route('/geometry')
+def get_geometry():
+    name = request.args.get('name')
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'f32'):
+        return 'format must be json or f32', 400
+    design = get_design_by_name(name)
+    if not design:
+        return 'Not found', 404
+    design_type, dimensions, colors = design[2], json.loads(design[3]), json.loads(design[4])
+    etag = artifact_key(fmt, design_type, dimensions, colors, get_palette().version).rsplit('/', 1)[-1]
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        geometry = design_geometry(design_type, dimensions, colors)
+        if fmt == 'f32':
+            response = make_response(packed_geometry(geometry))
+            response.mimetype = 'application/octet-stream'
+        else:
+            response = jsonify(quantized_geometry(geometry))
+    response.set_etag(etag)
+    # Names resolve to their latest version, so clients must revalidate (cheap thanks to the ETag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/pdf')
 def get_pdf():
@@ -183,11 +275,7 @@ def get_pdf():
     is_imperial = (units == 'imperial')
     unit_label = 'in' if is_imperial else 'cm'
 
-    conn = sqlite3.connect('designs.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM designs WHERE name = ? ORDER BY id DESC LIMIT 1', (name,))
-    design = c.fetchone()
-    conn.close()
+    design = get_design_by_name(name)
 
     if not design:
         return 'Not found', 404
@@ -200,38 +288,243 @@ def get_pdf():
         if dim not in ['gore']:
             dimensions[dim] = round(convert_to_imperial(dimensions[dim], is_imperial), 0) if is_imperial else round(dimensions[dim], 0)
 
-    pdf_io = generate_pdf(name, design_type, dimensions, colors, rod, date, unit_label)
-    pdf_io.seek(0)
-    return send_file(pdf_io, mimetype='application/pdf', download_name=f'{name}.pdf')
+    key = artifact_key('pdf', name, design_type, dimensions, colors, rod, date, unit_label, get_palette().version)
+    return serve_artifact(artifact_store, key, f'{name}.pdf',
+                          admission.guarded(lambda: generate_pdf(name, design_type, dimensions, colors, rod, date, unit_label)), tag=f'pdf:{name}:{units}')
 
 @app.route('/yaml')
 def get_yaml():
     name = request.args.get('name')
-    conn = sqlite3.connect('designs.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM designs WHERE name = ? ORDER BY id DESC LIMIT 1', (name,))
-    design = c.fetchone()
-    conn.close()
+    design = get_design_by_name(name)
     if not design:
         return 'Not found', 404
     id, name, design_type, dims_json, colors_json, rod, date, unit_label = design
     dimensions = json.loads(dims_json)
     colors = json.loads(colors_json)
     data = {'name': name, 'type': design_type, 'dimensions': dimensions, 'colors': colors, 'material': 'Icarex Ripstop', 'rod': rod, 'creation_date': date}
-    yaml_io = io.StringIO()
-    yaml.dump(data, yaml_io)
-    yaml_io.seek(0)
-    return send_file(yaml_io, mimetype='text/yaml', download_name=f'{name}.yaml')
+    return serve_artifact(artifact_store, artifact_key('yaml', data), f'{name}.yaml', admission.guarded(lambda: io.StringIO(yaml.dump(data))), tag=f'yaml:{name}')
+
+@app.route('/cut')
+def get_cut_file():
+    # One or more designs in a single job: /cut?name=a&name=b&format=dxf
+    names = request.args.getlist('name')
+    fmt = request.args.get('format', 'dxf')
+    if not names or fmt not in ('dxf', 'hpgl'):
+        return 'name and format (dxf or hpgl) are required', 400
+    try:
+        seam_allowance = parse_mm(request.args, 'seam_allowance', 10, MAX_SEAM_ALLOWANCE)
+        roll_width = parse_mm(request.args, 'roll_width', 1500, MAX_ROLL_WIDTH)
+    except ValueError as e:
+        return str(e), 400
+    designs = []
+    for name in names:
+        design = get_design_by_name(name)
+        if not design:
+            return f'Not found: {name}', 404
+        designs.append((name, design[2], json.loads(design[3])))
+    key = artifact_key(fmt, designs, seam_allowance, roll_width)
+    writer = generate_dxf if fmt == 'dxf' else generate_hpgl
+    download_name = f'{names[0]}.{fmt}' if len(names) == 1 else f'cut_job.{fmt}'
+    try:
+        return serve_artifact(artifact_store, key, download_name,
+                              admission.guarded(lambda: writer(build_cut_job(designs, seam_allowance, roll_width))))
+    except ValueError as e:
+        return str(e), 400
+
+def project_file(project):
+    # projects/<project>.yaml, refusing paths that leave the projects directory
+    projects_dir = os.path.realpath('projects')
+    path = os.path.realpath(os.path.join(projects_dir, project + '.yaml'))
+    if not path.startswith(projects_dir + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+@app.route('/unfold')
+def unfold():
+    # Flat panels for a 3D project shape: /unfold?project=line_laundry/windsock/bol&format=json|dxf|hpgl
+    project = request.args.get('project', '')
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'dxf', 'hpgl'):
+        return 'format must be json, dxf or hpgl', 400
+    path = project_file(project)
+    if not path:
+        return 'Not found', 404
+    try:
+        # The project's own seam allowance unless overridden
+        seam_allowance = parse_mm(request.args, 'seam_allowance', None, MAX_SEAM_ALLOWANCE)
+        roll_width = parse_mm(request.args, 'roll_width', 1500, MAX_ROLL_WIDTH)
+    except ValueError as e:
+        return str(e), 400
+    try:
+        result = unfold_project(path)
+        plan = project_seams(path, seam_allowance)
+    except (ValueError, KeyError) as e:
+        return f'Cannot unfold {project}: {e}', 400
+    if fmt == 'json':
+        return jsonify(result)
+    panels = plan_cut_panels(plan, result['name'])
+    key = artifact_key(fmt, 'unfold', panels, roll_width)
+    writer = generate_dxf if fmt == 'dxf' else generate_hpgl
+    try:
+        return serve_artifact(artifact_store, key, f"{os.path.basename(project)}.{fmt}",
+                              admission.guarded(lambda: writer(layout_cut_job(panels, roll_width=roll_width))))
+    except ValueError as e:
+        return str(e), 400
+
+@app.route('/materials')
+def materials():
+    # Material estimate for a batch of orders: /materials?name=a&name=b&project=line_laundry/tube/tube&roll_width=1500
+    names = request.args.getlist('name')
+    projects = request.args.getlist('project')
+    if not names and not projects:
+        return jsonify({'error': 'name or project is required'}), 400
+    try:
+        seam_allowance = parse_mm(request.args, 'seam_allowance', None, MAX_SEAM_ALLOWANCE)
+        roll_width = parse_mm(request.args, 'roll_width', 1500, MAX_ROLL_WIDTH)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    plans = []
+    for name in names:
+        design = get_design_by_name(name)
+        if not design:
+            return jsonify({'error': f'Not found: {name}'}), 404
+        plans.append((name, design_seams(design[2], json.loads(design[3]), 10 if seam_allowance is None else seam_allowance)))
+    for project in projects:
+        path = project_file(project)
+        if not path:
+            return jsonify({'error': f'Not found: {project}'}), 404
+        try:
+            plans.append((project, project_seams(path, seam_allowance)))
+        except (ValueError, KeyError) as e:
+            return jsonify({'error': f'Cannot plan {project}: {e}'}), 400
+    try:
+        return jsonify(estimate_materials(plans, roll_width))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/pull')
+def pull():
+    # Line pull ranking: /pull?wind_min=2&wind_max=15&step=1&rating=50lb[&name=a&name=b][&project=line_laundry/windsock/bol]
+    names = request.args.getlist('name')
+    try:
+        wind_min = float(request.args.get('wind_min', 2))
+        wind_max = float(request.args.get('wind_max', 15))
+        step = float(request.args.get('step', 1))
+        speeds = wind_speeds(wind_min, wind_max, step)
+        rating = parse_rating(request.args['rating']) if request.args.get('rating') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    projects = []
+    for project in request.args.getlist('project'):
+        path = project_file(project)
+        if not path:
+            return jsonify({'error': f'Not found: {project}'}), 404
+        try:
+            projects.append((project, *project_drag_area(path)))
+        except (ValueError, KeyError) as e:
+            return jsonify({'error': f'Cannot estimate {project}: {e}'}), 400
+    designs = get_latest_designs()
+    if names or projects:
+        designs = [d for d in designs if d[1] in names]
+    ranked = rank_designs(designs, speeds, rating, projects)
+    return jsonify({'wind_speeds': speeds.tolist(), 'rating': rating, 'designs': ranked})
+
+@app.route('/palette')
+def palette():
+    # Fabric colors and who stocks them: /palette[?color=green&material=icarex&supplier=kitemana]
+    fabric = get_palette()
+    material = request.args.get('material')
+    supplier = request.args.get('supplier')
+    color = request.args.get('color')
+    if color is None:
+        return jsonify({'version': fabric.version, 'colors': [
+            {**c.as_dict(), 'suppliers': fabric.suppliers(c.code, material, supplier)} for c in fabric.colors.values()]})
+    resolved = fabric.resolve(color)
+    nearest = fabric.nearest(resolved.hex if resolved.code else color, material, supplier)
+    if nearest is None:
+        return jsonify({'error': 'No color available for that material/supplier'}), 404
+    distance = sum((a - b) ** 2 for a, b in zip(resolved.lab, nearest.lab)) ** 0.5
+    return jsonify({'color': color, 'resolved': resolved.as_dict(), 'nearest_available': nearest.as_dict(),
+                    'delta_e': round(distance, 2), 'suppliers': fabric.suppliers(nearest.code, material, supplier)})
+
+@app.route('/lookbook')
+def lookbook():
+    # Catalog of all latest designs (or /lookbook?name=a&name=b), streamed page by page
+    names = request.args.getlist('name')
+    designs = get_latest_designs()
+    if names:
+        designs = [d for d in designs if d[1] in names]
+    response = app.response_class(admission.streamed(stream_with_context(generate_lookbook(designs, get_palette()))),
+                                  mimetype='application/pdf')
+    response.headers['Content-Disposition'] = 'inline; filename="lookbook.pdf"'
+    return response
+
+@app.route('/impose')
+def impose_print():
+    # Shared 1:1 print run: /impose?name=a&name=b&sheet=a4|a3|roll&seam_allowance=10
+    names = request.args.getlist('name')
+    sheet = request.args.get('sheet', 'a4')
+    if not names or sheet not in SHEETS:
+        return f"name and sheet ({', '.join(SHEETS)}) are required", 400
+    try:
+        seam_allowance = parse_mm(request.args, 'seam_allowance', 10, MAX_SEAM_ALLOWANCE)
+    except ValueError as e:
+        return str(e), 400
+    designs = []
+    for name in names:
+        design = get_design_by_name(name)
+        if not design:
+            return f'Not found: {name}', 404
+        designs.append((name, design[2], json.loads(design[3])))
+    try:
+        plan = admission.guarded(lambda: impose(designs, sheet, seam_allowance))()
+    except ValueError as e:
+        return str(e), 400
+    response = app.response_class(admission.streamed(stream_with_context(generate_imposition(plan))),
+                                  mimetype='application/pdf')
+    response.headers['Content-Disposition'] = f'inline; filename="print_{sheet}.pdf"'
+    response.headers['X-Sheets'] = f"{len(plan['sheets'])}; separate={plan['separate_sheets']}; tiles={plan['tiles']}"
+    return response
 
 @app.route('/designs')
 def designs():
-    conn = sqlite3.connect('designs.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM designs ORDER BY creation_date DESC')
-    all_designs = c.fetchall()
-    conn.close()
+    all_designs = get_latest_designs()
     return render_template('designs.html', designs=all_designs)
 
+@app.route('/versions')
+def versions():
+    name = request.args.get('name')
+    history = list_versions(name)
+    if not history:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({'name': name, 'versions': history})
+
+@app.route('/diff')
+def diff():
+    name = request.args.get('name')
+    try:
+        old = get_design_version(name, int(request.args['from']))
+        new = get_design_version(name, int(request.args['to']))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'from and to must be version numbers'}), 400
+    if not old or not new:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({'name': name, 'from': int(request.args['from']), 'to': int(request.args['to']), 'changes': diff_versions(old, new)})
+
+@app.route('/rollback', methods=['POST'])
+def rollback():
+    name = request.form['name']
+    units = request.form.get('units', 'metric')
+    try:
+        version = rollback_design(name, int(request.form['version']))
+    except ValueError:
+        version = None
+    if version is None:
+        flash('Version not found.')
+    else:
+        flash(f'{name} restored as version {version}.')
+    return redirect(url_for('output', name=name, units=units))
+
 @app.route('/help')
 def help():
     return render_template('help.html')
@@ -1,4 +1,46 @@
+import os
+
 class Config:
     SECRET_KEY = 'super_secret_key'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///designs.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Rendered SVG/PDF/YAML artifacts: 'local' (shared directory), 'pack' (pack files + mapped index) or 's3' (S3/MinIO bucket)
+    ARTIFACT_STORE = os.environ.get('ARTIFACT_STORE', 'local')
+    ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', 'data/artifacts')
+    ARTIFACT_PACK_DIR = os.environ.get('ARTIFACT_PACK_DIR', 'data/packs')
+    ARTIFACT_PACK_COMPACT_INTERVAL = int(os.environ.get('ARTIFACT_PACK_COMPACT_INTERVAL', 300))  # seconds, 0 disables
+    ARTIFACT_S3_BUCKET = os.environ.get('ARTIFACT_S3_BUCKET', 'kite-laundry-artifacts')
+    ARTIFACT_S3_ENDPOINT = os.environ.get('ARTIFACT_S3_ENDPOINT')  # e.g. http://localhost:9000 for MinIO; check with python -m src.storage
+    ARTIFACT_S3_PREFIX = os.environ.get('ARTIFACT_S3_PREFIX', '')
+    ARTIFACT_S3_REGION = os.environ.get('ARTIFACT_S3_REGION')
+    ARTIFACT_S3_ACCESS_KEY = os.environ.get('ARTIFACT_S3_ACCESS_KEY')
+    ARTIFACT_S3_SECRET_KEY = os.environ.get('ARTIFACT_S3_SECRET_KEY')
+    # Logging: JSON lines written by a background thread (src/logs.py)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = {  # per-logger overrides, e.g. 'src.packstore': 'DEBUG'
+        'werkzeug': 'WARNING',
+        'reportlab': 'WARNING',
+        'PIL': 'WARNING',
+        'botocore': 'WARNING',
+    }
+    LOG_DEBUG_SAMPLE_EVERY = int(os.environ.get('LOG_DEBUG_SAMPLE_EVERY', 100))  # keep 1 in N DEBUG records per call site
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped, never waited on
+    LOG_FILE = os.environ.get('LOG_FILE')  # default: stderr
+    # Admission control (src/admission.py), per worker: client_rate/client_burst per client,
+    # render_rate/render_burst for cold renders of the route; cold routes pay the render bucket up front
+    # and hold one of ADMISSION_MAX_RENDERS slots while their body streams
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') != '0'
+    ADMISSION_ROUTES = {
+        'get_pdf': {'client_rate': 1, 'client_burst': 5, 'render_rate': 4, 'render_burst': 8},
+        'get_svg': {'client_rate': 5, 'client_burst': 20, 'render_rate': 20, 'render_burst': 40},
+        'get_yaml': {'client_rate': 5, 'client_burst': 20, 'render_rate': 50, 'render_burst': 100},
+        'get_cut_file': {'client_rate': 1, 'client_burst': 5, 'render_rate': 4, 'render_burst': 8},
+        'unfold': {'client_rate': 1, 'client_burst': 5, 'render_rate': 4, 'render_burst': 8},
+        'preview': {'client_rate': 10, 'client_burst': 30, 'render_rate': 50, 'render_burst': 100},
+        'lookbook': {'client_rate': 0.1, 'client_burst': 2, 'render_rate': 0.5, 'render_burst': 2, 'cold': True},
+        'impose_print': {'client_rate': 0.1, 'client_burst': 2, 'render_rate': 0.5, 'render_burst': 2, 'cold': True},
+    }
+    ADMISSION_MAX_RENDERS = int(os.environ.get('ADMISSION_MAX_RENDERS', 2))  # concurrent cold renders per worker
+    ADMISSION_RENDER_WAIT = float(os.environ.get('ADMISSION_RENDER_WAIT', 0.1))  # seconds to wait for a render slot
+    ADMISSION_MAX_CLIENTS = 10000  # client buckets kept per route (LRU)
+    ADMISSION_TRUST_PROXY = os.environ.get('ADMISSION_TRUST_PROXY', '0') == '1'  # client id from X-Forwarded-For
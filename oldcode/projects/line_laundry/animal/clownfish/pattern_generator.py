@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+import svgwrite
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'templates'))
+from base_pattern import BasePattern  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_svg(pattern, length, seam_allowance=None, gap=20):
+    """
+    Lay out all pieces of the pattern at full size, one row, cut line solid and sew line dashed.
+    Args: pattern (BasePattern), length (mm), seam_allowance (mm, default from config), gap (mm)
+    Returns: svgwrite.Drawing sized in mm
+    """
+    pieces = pattern.pieces(length, seam_allowance)
+    x_offset = 0
+    height = 0
+    shapes = []
+    for piece in pieces:
+        xs = [p[0] for p in piece['cut_outline']]
+        ys = [p[1] for p in piece['cut_outline']]
+        dx, dy = x_offset - min(xs), -min(ys)
+        shapes.append((piece, dx, dy))
+        x_offset += max(xs) - min(xs) + gap
+        height = max(height, max(ys) - min(ys))
+    width = max(x_offset - gap, 1)
+    dwg = svgwrite.Drawing(size=(f'{width:.1f}mm', f'{height + 40:.1f}mm'), viewBox=f'0 0 {width:.1f} {height + 40:.1f}')
+    for piece, dx, dy in shapes:
+        cut = [(x + dx, y + dy) for x, y in piece['cut_outline']]
+        sew = [(x + dx, y + dy) for x, y in piece['outline']]
+        dwg.add(dwg.polygon(cut, fill='none', stroke='black', stroke_width=0.5))
+        dwg.add(dwg.polygon(sew, fill='none', stroke='grey', stroke_width=0.5, stroke_dasharray='4,2'))
+        label = f"{piece['name']} x{piece['count']}" + (' (mirror pair)' if piece['mirror'] else '')
+        dwg.add(dwg.text(label, insert=(min(p[0] for p in cut), height + 20), font_size=12))
+    return dwg
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a full-size clownfish line laundry pattern (SVG, mm).')
+    parser.add_argument('--length', type=float, default=1000, help='Overall length in mm (default 1000)')
+    parser.add_argument('--seam-allowance', type=float, default=None, help='Seam allowance in mm (default from config)')
+    parser.add_argument('output', nargs='?', default='clownfish_pattern.svg', help='Output SVG file')
+    args = parser.parse_args()
+
+    pattern = BasePattern.from_yaml(os.path.join(HERE, 'config.yaml'))
+    start = time.perf_counter()
+    dwg = generate_svg(pattern, args.length, args.seam_allowance)
+    dwg.saveas(args.output)
+    seams = sum(p['seam_length'] * p['count'] for p in pattern.pieces(args.length, args.seam_allowance))
+    print(f'{pattern.name} at {args.length / 1000:g} m -> {args.output} '
+          f'({seams / 1000:.1f} m of seams, {time.perf_counter() - start:.3f}s)')
+
+
+if __name__ == '__main__':
+    main()
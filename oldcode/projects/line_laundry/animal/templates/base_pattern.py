@@ -0,0 +1,167 @@
+import math
+from functools import lru_cache
+import yaml
+
+from seam_calculator import offset_outline, outline_length
+
+# Paths in config.yaml are lists of commands in base-size millimetres:
+#   [M, [x, y]]                      move to (start of the outline)
+#   [L, [x, y]]                      line to
+#   [Q, [cx, cy], [x, y]]            quadratic Bezier
+#   [C, [c1x, c1y], [c2x, c2y], [x, y]]  cubic Bezier
+#   [Z]                              close
+
+
+def snap_tolerance(tolerance):
+    """
+    Round a unit-space chord tolerance down to a power of two.
+    Nearby scales then share one flattening (at least as fine as requested),
+    so resizing only re-flattens when the size changes by more than ~2x.
+    """
+    return 2.0 ** math.floor(math.log2(tolerance))
+
+
+@lru_cache(maxsize=4096)
+def flatten_cubic(p0, p1, p2, p3, tolerance):
+    """
+    Adaptively flatten a cubic Bezier: subdivide (de Casteljau) until the control
+    points lie within tolerance of the chord.
+    Args: p0..p3 ((x, y) tuples), tolerance (float, same units)
+    Returns: tuple of points after p0, ending with p3
+    """
+    points = []
+    stack = [(p0, p1, p2, p3, 0)]
+    while stack:
+        a, b, c, d, depth = stack.pop()
+        if depth >= 16 or _flat_enough(a, b, c, d, tolerance):
+            points.append(d)
+            continue
+        ab = _mid(a, b)
+        bc = _mid(b, c)
+        cd = _mid(c, d)
+        abc = _mid(ab, bc)
+        bcd = _mid(bc, cd)
+        m = _mid(abc, bcd)
+        # Second half first so the first half is popped (and emitted) first
+        stack.append((m, bcd, cd, d, depth + 1))
+        stack.append((a, ab, abc, m, depth + 1))
+    return tuple(points)
+
+
+def _mid(a, b):
+    return ((a[0] + b[0]) / 2, (a[1] + b[1]) / 2)
+
+
+def _flat_enough(a, b, c, d, tolerance):
+    dx, dy = d[0] - a[0], d[1] - a[1]
+    chord = math.hypot(dx, dy)
+    if chord == 0:
+        return math.dist(a, b) <= tolerance and math.dist(a, c) <= tolerance
+    d1 = abs((b[0] - a[0]) * dy - (b[1] - a[1]) * dx) / chord
+    d2 = abs((c[0] - a[0]) * dy - (c[1] - a[1]) * dx) / chord
+    return max(d1, d2) <= tolerance
+
+
+@lru_cache(maxsize=512)
+def flatten_path(path, tolerance):
+    """
+    Flatten a path (tuple of commands, see module comment) to a closed polyline.
+    Each curve segment is cached separately, so editing one segment of an outline
+    re-flattens just that segment.
+    Returns: tuple of (x, y) in path units (closing point not repeated)
+    """
+    points = []
+    current = start = None
+    for command in path:
+        op, args = command[0], command[1:]
+        if op == 'M':
+            current = start = tuple(args[0])
+            points.append(current)
+        elif op == 'L':
+            current = tuple(args[0])
+            points.append(current)
+        elif op == 'Q':
+            c, end = tuple(args[0]), tuple(args[1])
+            # Degree-elevate to a cubic so there is one flattener to cache
+            c1 = (current[0] + 2 / 3 * (c[0] - current[0]), current[1] + 2 / 3 * (c[1] - current[1]))
+            c2 = (end[0] + 2 / 3 * (c[0] - end[0]), end[1] + 2 / 3 * (c[1] - end[1]))
+            points.extend(flatten_cubic(current, c1, c2, end, tolerance))
+            current = end
+        elif op == 'C':
+            c1, c2, end = tuple(args[0]), tuple(args[1]), tuple(args[2])
+            points.extend(flatten_cubic(current, c1, c2, end, tolerance))
+            current = end
+        elif op == 'Z':
+            current = start
+        else:
+            raise ValueError(f'Unknown path command: {op}')
+    if len(points) > 1 and math.dist(points[0], points[-1]) < 1e-9:
+        points.pop()
+    return tuple(points)
+
+
+def _freeze(path):
+    # YAML gives nested lists; caches need hashable tuples
+    return tuple((command[0], *(tuple(arg) for arg in command[1:])) for command in path)
+
+
+class BasePattern:
+    """
+    Shaped inflatable (animal) pattern defined by Bezier outlines in YAML.
+
+    Outlines are drawn at base_length (mm) and scaled to the requested length.
+    Flattening happens in base units at a snapped tolerance and is cached per
+    segment; the seam-allowance offset is done at full size (allowance does not
+    scale) and cached per piece and size.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.name = config.get('name', 'Animal')
+        self.base_length = float(config.get('base_length', 1000))
+        self.tolerance = float(config.get('tolerance', 1.0))
+        self.seam_allowance = float(config.get('seam_allowance', 10))
+        self.paths = {name: _freeze(piece['path']) for name, piece in config['pieces'].items()}
+
+    @classmethod
+    def from_yaml(cls, path):
+        with open(path, 'r') as f:
+            return cls(yaml.safe_load(f))
+
+    def outline(self, piece, length):
+        """
+        Flattened outline of a piece at full size.
+        Args: piece (str), length (float, mm overall length of the animal)
+        Returns: list of (x, y) mm
+        """
+        scale = length / self.base_length
+        points = flatten_path(self.paths[piece], snap_tolerance(self.tolerance / scale))
+        return [(x * scale, y * scale) for x, y in points]
+
+    def cut_outline(self, piece, length, seam_allowance=None):
+        allowance = self.seam_allowance if seam_allowance is None else seam_allowance
+        return list(_cut_outline(self, piece, length, allowance))
+
+    def pieces(self, length, seam_allowance=None):
+        """
+        All pieces at full size.
+        Returns: list of dicts with name, color, count, mirror, outline, cut_outline, seam_length (mm)
+        """
+        result = []
+        for name, piece in self.config['pieces'].items():
+            outline = self.outline(name, length)
+            result.append({
+                'name': name,
+                'color': piece.get('color'),
+                'count': piece.get('count', 1),
+                'mirror': piece.get('mirror', False),
+                'outline': outline,
+                'cut_outline': self.cut_outline(name, length, seam_allowance),
+                'seam_length': outline_length(outline),
+            })
+        return result
+
+
+@lru_cache(maxsize=256)
+def _cut_outline(pattern, piece, length, allowance):
+    return tuple(offset_outline(pattern.outline(piece, length), allowance))
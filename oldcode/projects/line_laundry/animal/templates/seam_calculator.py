@@ -0,0 +1,88 @@
+import math
+import numpy as np
+
+
+def signed_area(points):
+    """Shoelace area; the sign gives the winding direction."""
+    n = len(points)
+    return sum(points[i][0] * points[(i + 1) % n][1] - points[(i + 1) % n][0] * points[i][1] for i in range(n)) / 2
+
+
+def outline_length(points):
+    """Perimeter of a closed outline (the seam to sew), same units as points."""
+    return sum(math.dist(points[i - 1], points[i]) for i in range(len(points)))
+
+
+def offset_outline(points, distance, arc_tolerance=0.25):
+    """
+    Offset a simple closed outline outward by distance, e.g. for seam allowance.
+
+    Works for concave shapes (fins, tails): convex corners get round joins, concave
+    corners get both shifted edge ends, and the loops this creates where offset
+    edges cross are cut out afterwards. A loop is dropped when its winding is
+    reversed, or when it is the smaller of two same-direction parts.
+    Args: points (list of (x, y)), distance (float), arc_tolerance (max chord error of round joins)
+    Returns: list of (x, y)
+    """
+    pts = [p for i, p in enumerate(points) if math.dist(p, points[i - 1]) > 1e-9]
+    if len(pts) < 3 or distance <= 0:
+        return list(pts)
+    sign = 1 if signed_area(pts) > 0 else -1
+    raw = []
+    n = len(pts)
+    step = 2 * math.acos(max(-1.0, 1 - arc_tolerance / distance)) if distance > arc_tolerance else math.pi / 2
+    for i in range(n):
+        prev, cur, nxt = pts[i - 1], pts[i], pts[(i + 1) % n]
+        n0 = _normal(prev, cur, sign)
+        n1 = _normal(cur, nxt, sign)
+        turn = (cur[0] - prev[0]) * (nxt[1] - cur[1]) - (cur[1] - prev[1]) * (nxt[0] - cur[0])
+        raw.append((cur[0] + n0[0] * distance, cur[1] + n0[1] * distance))
+        if turn * sign > 0:
+            # Convex corner: round join from the previous edge's normal to the next one's
+            angle = math.atan2(n0[0] * n1[1] - n0[1] * n1[0], n0[0] * n1[0] + n0[1] * n1[1])
+            start = math.atan2(n0[1], n0[0])
+            segments = max(1, math.ceil(abs(angle) / step))
+            for k in range(1, segments):
+                a = start + angle * k / segments
+                raw.append((cur[0] + math.cos(a) * distance, cur[1] + math.sin(a) * distance))
+        raw.append((cur[0] + n1[0] * distance, cur[1] + n1[1] * distance))
+    return _remove_loops(raw, sign)
+
+
+def _normal(a, b, sign):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length = math.hypot(dx, dy)
+    return (sign * dy / length, -sign * dx / length)
+
+
+def _remove_loops(pts, sign):
+    """Cut self-intersection loops out of a closed polyline (vectorized segment tests)."""
+    pts = [p for i, p in enumerate(pts) if math.dist(p, pts[i - 1]) > 1e-9]
+    i = 0
+    P = np.asarray(pts, dtype=float)
+    while i < len(pts) - 2:
+        Q = np.roll(P, -1, axis=0)
+        a, b = P[i], Q[i]
+        last = len(pts) - 1 if i > 0 else len(pts) - 2  # skip the neighbouring segments
+        c, d = P[i + 2:last + 1], Q[i + 2:last + 1]
+        r = b - a
+        s = d - c
+        denom = r[0] * s[:, 1] - r[1] * s[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((c[:, 0] - a[0]) * s[:, 1] - (c[:, 1] - a[1]) * s[:, 0]) / denom
+            u = ((c[:, 0] - a[0]) * r[1] - (c[:, 1] - a[1]) * r[0]) / denom
+        hits = np.nonzero((np.abs(denom) > 1e-12) & (t > 1e-9) & (t < 1 - 1e-9) & (u > 1e-9) & (u < 1 - 1e-9))[0]
+        if len(hits) == 0:
+            i += 1
+            continue
+        j = i + 2 + int(hits[0])
+        x = (a[0] + t[hits[0]] * r[0], a[1] + t[hits[0]] * r[1])
+        loop = [x] + pts[i + 1:j + 1]
+        rest = pts[:i + 1] + [x] + pts[j + 1:]
+        loop_area, rest_area = signed_area(loop) * sign, signed_area(rest) * sign
+        if loop_area < 0 or (rest_area > 0 and loop_area < rest_area):
+            pts = rest
+        else:
+            pts, i = loop, 0
+        P = np.asarray(pts, dtype=float)
+    return pts
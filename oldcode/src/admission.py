@@ -0,0 +1,172 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import request
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; the app turns it into a 429/503 with Retry-After."""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, holding at most burst."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, cost=1.0):
+        """
+        Take cost tokens if available.
+        Returns: 0.0 when admitted, otherwise seconds until enough tokens will be available
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return 0.0
+            return (cost - self.tokens) / self.rate if self.rate else float('inf')
+
+
+class BucketTable:
+    """Token buckets per key (client), least recently used evicted beyond max_keys."""
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate, self.burst, self.max_keys = rate, burst, max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, cost=1.0):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+                if len(self.buckets) > self.max_keys:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+        return bucket.take(cost)
+
+
+class _HeldStream:
+    """Response body that calls release once, when its chunks run out or the response is closed."""
+
+    def __init__(self, chunks, release):
+        self.chunks = iter(chunks)
+        self.release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        release, self.release = self.release, None
+        if release is None:
+            return
+        try:
+            if hasattr(self.chunks, 'close'):
+                self.chunks.close()
+        finally:
+            release()
+
+
+class AdmissionController:
+    """
+    Admission control for expensive endpoints, per worker process.
+
+    Every request to a configured route pays its client's token bucket (429 when
+    empty). Cold renders additionally pay the route's shared bucket and need one of
+    a few render slots (503 when neither is free within ADMISSION_RENDER_WAIT).
+    Cache hits skip both, so stored artifacts keep being served while cold
+    renders are shed. Routes marked cold (streamed, uncached exports) pay the
+    route bucket up front and hold a render slot while their body streams.
+    Config keys: ADMISSION_ENABLED, ADMISSION_ROUTES, ADMISSION_MAX_RENDERS,
+                 ADMISSION_RENDER_WAIT, ADMISSION_MAX_CLIENTS, ADMISSION_TRUST_PROXY
+    """
+
+    def __init__(self, config):
+        self.enabled = config.get('ADMISSION_ENABLED', True)
+        self.render_wait = config.get('ADMISSION_RENDER_WAIT', 0.1)
+        self.trust_proxy = config.get('ADMISSION_TRUST_PROXY', False)
+        self.slots = threading.BoundedSemaphore(config.get('ADMISSION_MAX_RENDERS', 2))
+        max_clients = config.get('ADMISSION_MAX_CLIENTS', 10000)
+        self.routes = {}
+        for endpoint, limits in config.get('ADMISSION_ROUTES', {}).items():
+            self.routes[endpoint] = {
+                'clients': BucketTable(limits['client_rate'], limits['client_burst'], max_clients),
+                'renders': TokenBucket(limits['render_rate'], limits['render_burst']),
+                'cold': limits.get('cold', False),
+            }
+
+    def client_id(self):
+        if self.trust_proxy and request.access_route:
+            return request.access_route[0]
+        return request.remote_addr or 'unknown'
+
+    def admit(self):
+        """before_request hook: charge the client's bucket for configured routes."""
+        route = self.routes.get(request.endpoint) if self.enabled else None
+        if route is None:
+            return
+        wait = route['clients'].take(self.client_id())
+        if wait:
+            raise Overloaded(429, wait, 'Too many requests, slow down.')
+        if route['cold']:
+            wait = route['renders'].take()
+            if wait:
+                raise Overloaded(503, wait, 'Busy rendering, try again shortly.')
+
+    def guarded(self, render):
+        """
+        Wrap a render callable (as passed to serve_artifact) so it only runs with a
+        free render slot and within the route's cold-render rate.
+        """
+        def run():
+            route = self.routes.get(request.endpoint) if self.enabled else None
+            if route is None:
+                return render()
+            if not route['cold']:
+                wait = route['renders'].take()
+                if wait:
+                    raise Overloaded(503, wait, 'Busy rendering, try again shortly.')
+            if not self.slots.acquire(timeout=self.render_wait):
+                raise Overloaded(503, 1, 'All render slots busy, try again shortly.')
+            try:
+                return render()
+            finally:
+                self.slots.release()
+        return run
+
+    def streamed(self, chunks):
+        """
+        Hold a render slot for the life of a streamed response body, which renders as it
+        is sent. The slot is taken now, so a busy worker still answers 503, and released
+        when the body is exhausted or the server closes it (client gone).
+        Returns: iterable for the response
+        """
+        route = self.routes.get(request.endpoint) if self.enabled else None
+        if route is None:
+            return chunks
+        if not self.slots.acquire(timeout=self.render_wait):
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            raise Overloaded(503, 1, 'All render slots busy, try again shortly.')
+        return _HeldStream(chunks, self.slots.release)
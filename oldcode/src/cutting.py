@@ -0,0 +1,289 @@
+import io
+import json
+import math
+
+HPGL_UNITS_PER_MM = 40  # HP-GL plotter units
+ARC_TOLERANCE = 0.5  # mm, largest gap between a curved edge and its chords
+MAX_ARC_SEGMENTS = 256
+MITRE_LIMIT = math.sqrt(2)  # longest mitre, in allowances; a square corner is exactly at the limit
+
+def cut_panels(design_type, dimensions):
+    """
+    Flat, full-size panels to cut for a design (without seam allowance).
+    Dimensions are stored in cm; panels are returned in mm.
+    Args: design_type (str), dimensions (dict)
+    Returns: list of (label (str), points (list of (x, y) mm, counter-clockwise))
+    """
+    gore = dimensions.get('gore', 8 if design_type == 'spinner' else 6)
+    panels = []
+    if design_type == 'tail':
+        length = dimensions['length'] * 10
+        width = dimensions['width'] * 10
+        panels.append(('tail', _trapezoid(width, width, length)))
+    elif design_type == 'drogue':
+        # Cone from entry to outlet split into gore panels along its length
+        entry = dimensions['entry_diameter'] * 10
+        outlet = dimensions['outlet_diameter'] * 10
+        slant = math.hypot(dimensions['length'] * 10, (entry - outlet) / 2)
+        for i in range(gore):
+            panels.append((f'gore {i + 1}/{gore}', _trapezoid(math.pi * entry / gore, math.pi * outlet / gore, slant)))
+    elif design_type == 'spinner':
+        # Tapering cone cut as rings; each ring is a frustum that unrolls to an annular sector
+        entry = dimensions['entry_diameter'] * 10
+        step = dimensions['length'] * 10 / gore
+        for i in range(gore):
+            top = entry - entry * i / gore
+            bottom = entry - entry * (i + 1) / gore
+            slant = math.hypot(step, (top - bottom) / 2)
+            panels.append((f'ring {i + 1}/{gore}', _annular_sector(top, bottom, slant)))
+    elif design_type == 'graded_tail':
+        width = dimensions['width'] * 10
+        step = dimensions['length'] * 10 / gore
+        for i in range(gore):
+            start_width = width - (width * 0.75 * i / gore)
+            end_width = width - (width * 0.75 * (i + 1) / gore)
+            panels.append((f'section {i + 1}/{gore}', [(0, 0), (step, 0), (step, end_width), (0, start_width)]))
+    return panels
+
+def _trapezoid(top, bottom, height):
+    # Symmetric trapezoid, top edge at y=0, counter-clockwise in y-up coordinates
+    inset = (top - bottom) / 2
+    return [(0, 0), (inset, height), (inset + bottom, height), (top, 0)][::-1]
+
+def _annular_sector(top, bottom, slant):
+    """
+    Flat pattern of a frustum (diameters top > bottom, slant height between them): the
+    annular sector between slant radii R = slant * top / (top - bottom) and R - slant,
+    over the angle pi * top / R, with the arcs as chords. A bottom of 0 gives a pie slice.
+    Edges run side, inner arc, side, outer arc (like _trapezoid), outer arc along y=0 at its middle.
+    """
+    outer = slant * top / (top - bottom)
+    inner = outer - slant
+    angle = math.pi * top / outer
+    segments = min(MAX_ARC_SEGMENTS, max(2, math.ceil(angle / (2 * math.acos(max(-1.0, 1 - ARC_TOLERANCE / outer))))))
+    # Apex at (0, outer); the angle runs from the right end of the arcs to the left
+    arc = [angle / 2 - angle * k / segments for k in range(segments + 1)]
+    inner_arc = [(inner * math.sin(a), outer - inner * math.cos(a)) for a in arc] if inner > 1e-9 else [(0.0, outer)]
+    outer_arc = [(outer * math.sin(a), outer - outer * math.cos(a)) for a in reversed(arc)]
+    return outer_arc[-1:] + inner_arc + outer_arc[:-1]
+
+def offset_polygon(points, distance):
+    """
+    Offset a simple polygon outward by distance, used for seam allowance.
+    Corners are mitred up to MITRE_LIMIT times the larger allowance of their two edges and
+    bevelled beyond that, so the apex of a pie-slice ring does not grow a long spike.
+    Concave corners (the inner arc of a ring) are fine while the offset is small against the curve radius.
+    Args: points (list of (x, y)), distance (float, or list of floats per edge points[i] -> points[i + 1], same units)
+    Returns: list of (x, y)
+    """
+    n = len(points)
+    distances = distance if isinstance(distance, (list, tuple)) else [distance] * n
+    area = sum(points[i][0] * points[(i + 1) % n][1] - points[(i + 1) % n][0] * points[i][1] for i in range(n))
+    sign = 1 if area > 0 else -1  # outward normal side depends on winding
+    lines = []
+    for i in range(n):
+        (x1, y1), (x2, y2) = points[i], points[(i + 1) % n]
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length == 0:
+            continue
+        nx, ny = sign * (y2 - y1) / length, -sign * (x2 - x1) / length
+        lines.append(((x1 + nx * distances[i], y1 + ny * distances[i]), (x2 - x1, y2 - y1), (x1, y1), distances[i]))
+    result = []
+    for i in range(len(lines)):
+        (p, d, _, dist_p), (q, e, corner, dist_q) = lines[i - 1], lines[i]
+        cross = d[0] * e[1] - d[1] * e[0]
+        if abs(cross) < 1e-12:
+            result.append(q)  # collinear edges
+            continue
+        t = ((q[0] - p[0]) * e[1] - (q[1] - p[1]) * e[0]) / cross
+        mitre = (p[0] + d[0] * t, p[1] + d[1] * t)
+        if cross * sign > 0 and math.dist(mitre, corner) > MITRE_LIMIT * max(dist_p, dist_q) + 1e-9:
+            # Sharp convex corner: bevel between the ends of the two offset edges
+            result.append((p[0] + d[0], p[1] + d[1]))
+            result.append(q)
+        else:
+            result.append(mitre)
+    return result
+
+def offset_overshoot(cut, sew):
+    """
+    Largest distance from a cut vertex to the sew outline, e.g. to check seam allowance joins.
+    Args: cut, sew (lists of (x, y))
+    Returns: float (same units)
+    """
+    def to_segment(pt, a, b):
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        length_sq = dx * dx + dy * dy
+        t = 0 if length_sq == 0 else max(0.0, min(1.0, ((pt[0] - a[0]) * dx + (pt[1] - a[1]) * dy) / length_sq))
+        return math.hypot(pt[0] - a[0] - t * dx, pt[1] - a[1] - t * dy)
+    return max(min(to_segment(pt, sew[i - 1], sew[i]) for i in range(len(sew))) for pt in cut)
+
+def layout_panels(panels, roll_width, gap=10):
+    """
+    Shelf layout of panels on a fabric roll: rows across the roll width, rows stacked along its length.
+    Args: panels (list of (label, points)), roll_width (mm), gap (mm between panels)
+    Returns: list of (label, placed points)
+    Raises ValueError when a panel is wider than the roll.
+    """
+    placed = []
+    x = y = shelf_height = 0
+    for label, points in sorted(panels, key=lambda p: -_bbox(p[1])[3]):
+        min_x, min_y, w, h = _bbox(points)
+        _check_width(label, w, roll_width)
+        if x > 0 and x + w > roll_width:
+            x, y, shelf_height = 0, y + shelf_height + gap, 0
+        placed.append((label, [(px - min_x + x, py - min_y + y) for px, py in points]))
+        x += w + gap
+        shelf_height = max(shelf_height, h)
+    return placed
+
+def _check_width(label, width, roll_width):
+    if width > roll_width + 1e-6:
+        raise ValueError(f'Panel {label} is {width:.0f} mm wide, wider than the {roll_width:g} mm roll')
+
+def _bbox(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+def order_cut_paths(paths, start=(0, 0)):
+    """
+    Order closed cut paths to minimise head travel: nearest-neighbour tour over path
+    centroids, improved with 2-opt, then each path is rotated to start at the vertex
+    closest to where the head is.
+    Args: paths (list of (label, points)), start ((x, y) head home position)
+    Returns: (ordered paths, travel distance)
+    """
+    if not paths:
+        return [], 0.0
+    centroids = [(sum(p[0] for p in pts) / len(pts), sum(p[1] for p in pts) / len(pts)) for _, pts in paths]
+    tour = []
+    remaining = set(range(len(paths)))
+    current = start
+    while remaining:
+        nearest = min(remaining, key=lambda i: math.dist(current, centroids[i]))
+        tour.append(nearest)
+        remaining.remove(nearest)
+        current = centroids[nearest]
+    # 2-opt on the open tour starting from the home position
+    nodes = [start] + [centroids[i] for i in tour]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(nodes) - 1):
+            for j in range(i + 1, len(nodes)):
+                a, b = nodes[i - 1], nodes[i]
+                c = nodes[j]
+                d = nodes[j + 1] if j + 1 < len(nodes) else None
+                before = math.dist(a, b) + (math.dist(c, d) if d else 0)
+                after = math.dist(a, c) + (math.dist(b, d) if d else 0)
+                if after < before - 1e-9:
+                    nodes[i:j + 1] = reversed(nodes[i:j + 1])
+                    tour[i - 1:j] = reversed(tour[i - 1:j])
+                    improved = True
+    ordered = []
+    travel = 0.0
+    head = start
+    for i in tour:
+        label, points = paths[i]
+        k = min(range(len(points)), key=lambda v: math.dist(head, points[v]))
+        points = points[k:] + points[:k]
+        travel += math.dist(head, points[0])
+        head = points[0]  # closed path ends where it started
+        ordered.append((label, points))
+    return ordered, travel
+
+def layout_cut_job(sew_panels, seam_allowance=10, roll_width=1500):
+    """
+    Add seam allowance to flat panels, lay them out on the roll and order them for cutting.
+    Args: sew_panels (list of (label, points in mm[, per-edge allowances])), seam_allowance (mm,
+          for panels without their own allowances), roll_width (mm)
+    Returns: list of (label, cut points, sew points) in cutting order
+    Raises ValueError when a panel with its allowance is wider than the roll.
+    """
+    panels = []
+    for label, points, *allowance in sew_panels:
+        allowance = allowance[0] if allowance else seam_allowance
+        panels.append((label, offset_polygon(points, allowance) if allowance else points, points))
+        _check_width(label, _bbox(panels[-1][1])[2], roll_width)
+    # Lay out the cut outlines and carry the sew line along with each one
+    placed = layout_panels([(i, cut) for i, (_, cut, _) in enumerate(panels)], roll_width)
+    moved = []
+    for i, cut in placed:
+        label, original_cut, sew = panels[i]
+        dx, dy = cut[0][0] - original_cut[0][0], cut[0][1] - original_cut[0][1]
+        moved.append((i, cut, [(x + dx, y + dy) for x, y in sew]))
+    ordered, _ = order_cut_paths([(i, cut) for i, cut, _ in moved])
+    sew_lines = {i: sew for i, _, sew in moved}
+    return [(panels[i][0], cut, sew_lines[i]) for i, cut in ordered]
+
+def _dxf_text(label):
+    # DXF is one value per line, so a newline in a label would start a new group code
+    return ''.join(c for c in str(label) if c.isprintable())
+
+def generate_dxf(job):
+    """
+    Write a cut job as DXF R12 in mm: CUT layer (with seam allowance), SEW layer and LABEL text.
+    Returns: io.StringIO
+    """
+    out = io.StringIO()
+    out.write('0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n0\nENDSEC\n')
+    out.write('0\nSECTION\n2\nENTITIES\n')
+    for label, cut, sew in job:
+        for layer, points in (('CUT', cut), ('SEW', sew)):
+            out.write(f'0\nPOLYLINE\n8\n{layer}\n66\n1\n70\n1\n')
+            for x, y in points:
+                out.write(f'0\nVERTEX\n8\n{layer}\n10\n{x:.3f}\n20\n{y:.3f}\n')
+            out.write(f'0\nSEQEND\n8\n{layer}\n')
+        cx = sum(p[0] for p in sew) / len(sew)
+        cy = sum(p[1] for p in sew) / len(sew)
+        out.write(f'0\nTEXT\n8\nLABEL\n10\n{cx:.3f}\n20\n{cy:.3f}\n40\n10\n1\n{_dxf_text(label)}\n')
+    out.write('0\nENDSEC\n0\nEOF\n')
+    return out
+
+def generate_hpgl(job):
+    """
+    Write the cut outlines of a job as HP-GL for plotters/cutters (pen 1, absolute, 40 units/mm).
+    Returns: io.StringIO
+    """
+    out = io.StringIO()
+    out.write('IN;SP1;PA;\n')
+    for label, cut, _ in job:
+        pts = [(round(x * HPGL_UNITS_PER_MM), round(y * HPGL_UNITS_PER_MM)) for x, y in cut]
+        out.write(f'PU{pts[0][0]},{pts[0][1]};')
+        out.write('PD' + ','.join(f'{x},{y}' for x, y in pts[1:] + pts[:1]) + ';\n')
+    out.write('PU0,0;SP0;\n')
+    return out
+
+def check_offsets(designs, seam_allowance=10):
+    """
+    Check that no cut vertex lies more than MITRE_LIMIT allowances from its sew outline.
+    Args: designs (list of (name, design_type, dimensions)), seam_allowance (mm)
+    Returns: number of panels checked
+    Raises ValueError naming the first panel that overshoots.
+    """
+    from src.seams import design_seams, plan_cut_panels  # seams builds on this module
+    checked = 0
+    for name, design_type, dimensions in designs:
+        for label, points, allowances in plan_cut_panels(design_seams(design_type, dimensions, seam_allowance), name):
+            overshoot = offset_overshoot(offset_polygon(points, allowances), points)
+            limit = MITRE_LIMIT * max(allowances)
+            if overshoot > limit + 1e-6:
+                raise ValueError(f'{label}: cut line {overshoot:.1f} mm from the sew line, limit {limit:.1f} mm')
+            checked += 1
+    return checked
+
+def main():
+    from src.db import get_latest_designs
+    designs = []
+    for design in get_latest_designs():
+        try:
+            row = (design[1], design[2], json.loads(design[3]))
+            cut_panels(*row[1:])
+        except (KeyError, ValueError):
+            continue  # incomplete legacy rows
+        designs.append(row)
+    print(f'{check_offsets(designs)} panels of {len(designs)} designs ok')
+
+if __name__ == '__main__':
+    main()
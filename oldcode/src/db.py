@@ -2,9 +2,15 @@ import sqlite3
 import os
 import yaml
 import json
+import hashlib
 from datetime import datetime
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Column order every reader unpacks: id, name, type, dimensions, colors, rod, creation_date, unit_label
+DESIGN_COLUMNS = 'd.id, d.name, d.type, d.dimensions, d.colors, d.rod, d.creation_date, d.unit_label'
+
 def init_db():
     conn = sqlite3.connect('designs.db')
     c = conn.cursor()
@@ -33,23 +39,166 @@ def init_db():
                         c.execute('INSERT OR IGNORE INTO designs (name, type, dimensions, colors, rod, creation_date, unit_label) VALUES (?, ?, ?, ?, ?, ?, ?)',
                                   (data['name'], data['type'], json.dumps(data.get('dimensions', {})), json.dumps(data.get('colors', [])), data.get('rod', 'none'), data.get('creation_date', datetime.now().isoformat()), 'cm'))
                     conn.commit()
+    init_versions(conn)
     conn.close()
 
+def init_versions(conn):
+    """
+    Create the version history tables and backfill rows saved before versioning existed.
+    design_versions: one row per (name, version), pointing at the designs row holding the content.
+    design_latest: one row per name with the current version, so lookups are a primary-key hit.
+    Args: conn (sqlite3.Connection)
+    """
+    c = conn.cursor()
+    c.execute('''PRAGMA table_info(designs)''')
+    columns = [info[1] for info in c.fetchall()]
+    if 'content_hash' not in columns:
+        c.execute('''ALTER TABLE designs ADD COLUMN content_hash TEXT''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_designs_name_hash ON designs (name, content_hash)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS design_versions
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT NOT NULL,
+                  version INTEGER NOT NULL,
+                  design_id INTEGER NOT NULL REFERENCES designs(id),
+                  creation_date TEXT NOT NULL,
+                  UNIQUE (name, version))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS design_latest
+                 (name TEXT PRIMARY KEY,
+                  design_id INTEGER NOT NULL REFERENCES designs(id),
+                  version INTEGER NOT NULL)''')
+    c.execute('SELECT id, name, type, dimensions, colors, rod, creation_date, unit_label FROM designs WHERE content_hash IS NULL ORDER BY id')
+    for row in c.fetchall():
+        design_id, name, design_type, dims_json, colors_json, rod, date, unit_label = row
+        content_hash = design_hash(design_type, json.loads(dims_json), json.loads(colors_json), rod, unit_label)
+        c.execute('SELECT id FROM designs WHERE name = ? AND content_hash = ? ORDER BY id LIMIT 1', (name, content_hash))
+        existing = c.fetchone()
+        c.execute('UPDATE designs SET content_hash = ? WHERE id = ?', (content_hash, design_id))
+        latest = _latest(c, name)
+        if existing and latest and latest[0] == existing[0]:
+            continue  # identical resubmit of the current version
+        _add_version(c, name, existing[0] if existing else design_id, date)
+    conn.commit()
+
+def design_hash(design_type, dimensions, colors, rod, unit_label):
+    payload = json.dumps([design_type, dimensions, colors, rod, unit_label], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _latest(c, name):
+    c.execute('SELECT design_id, version FROM design_latest WHERE name = ?', (name,))
+    return c.fetchone()
+
+def _add_version(c, name, design_id, date):
+    latest = _latest(c, name)
+    version = latest[1] + 1 if latest else 1
+    c.execute('INSERT INTO design_versions (name, version, design_id, creation_date) VALUES (?, ?, ?, ?)',
+              (name, version, design_id, date))
+    c.execute('INSERT OR REPLACE INTO design_latest (name, design_id, version) VALUES (?, ?, ?)',
+              (name, design_id, version))
+    return version
+
 def get_design_by_name(name):
     conn = sqlite3.connect('designs.db')
     c = conn.cursor()
-    c.execute('SELECT * FROM designs WHERE name = ? ORDER BY id DESC LIMIT 1', (name,))
+    c.execute(f'SELECT {DESIGN_COLUMNS} FROM design_latest l JOIN designs d ON d.id = l.design_id WHERE l.name = ?', (name,))
+    design = c.fetchone()
+    conn.close()
+    return design
+
+def get_design_version(name, version):
+    conn = sqlite3.connect('designs.db')
+    c = conn.cursor()
+    c.execute(f'SELECT {DESIGN_COLUMNS} FROM design_versions v JOIN designs d ON d.id = v.design_id WHERE v.name = ? AND v.version = ?',
+              (name, version))
     design = c.fetchone()
     conn.close()
     return design
 
+def get_latest_designs():
+    conn = sqlite3.connect('designs.db')
+    c = conn.cursor()
+    c.execute(f'SELECT {DESIGN_COLUMNS} FROM design_latest l JOIN designs d ON d.id = l.design_id ORDER BY d.creation_date DESC')
+    designs = c.fetchall()
+    conn.close()
+    return designs
+
+def list_versions(name):
+    """
+    Version history for a design name, newest first.
+    Returns: list of dicts with version, design_id, creation_date and current flag
+    """
+    conn = sqlite3.connect('designs.db')
+    c = conn.cursor()
+    c.execute('''SELECT v.version, v.design_id, v.creation_date, l.version IS NOT NULL
+                 FROM design_versions v LEFT JOIN design_latest l ON l.name = v.name AND l.version = v.version
+                 WHERE v.name = ? ORDER BY v.version DESC''', (name,))
+    versions = [{'version': v, 'design_id': d, 'creation_date': date, 'current': bool(cur)} for v, d, date, cur in c.fetchall()]
+    conn.close()
+    return versions
+
 def save_design(name, design_type, dimensions, colors, rod, units):
+    """
+    Save a design as a new version, reusing the stored row when the content is unchanged.
+    Returns: (version (int), created (bool)) - created is False for identical resubmits
+    """
+    content_hash = design_hash(design_type, dimensions, colors, rod, units)
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect('designs.db')
+    c = conn.cursor()
+    # Take the write lock before reading the latest version, so concurrent saves queue up instead of
+    # computing the same next version (sqlite3 would only BEGIN at the first INSERT)
+    c.execute('BEGIN IMMEDIATE')
+    latest = _latest(c, name)
+    c.execute('SELECT id FROM designs WHERE name = ? AND content_hash = ? ORDER BY id LIMIT 1', (name, content_hash))
+    existing = c.fetchone()
+    if existing and latest and latest[0] == existing[0]:
+        conn.close()
+        logger.info('Design unchanged: %s v%d', name, latest[1])
+        return latest[1], False
+    if existing:
+        design_id = existing[0]
+    else:
+        c.execute('INSERT INTO designs (name, type, dimensions, colors, rod, creation_date, unit_label, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                  (name, design_type, json.dumps(dimensions), json.dumps(colors), rod, now, units, content_hash))
+        design_id = c.lastrowid
+    version = _add_version(c, name, design_id, now)
+    conn.commit()
+    conn.close()
+    logger.info('Saved design: %s v%d', name, version)
+    return version, True
+
+def rollback_design(name, version):
+    """
+    Make an earlier version current again by recording it as a new version (history is never rewritten).
+    Returns: new version number, or None if the requested version does not exist
+    """
     conn = sqlite3.connect('designs.db')
     c = conn.cursor()
-    c.execute('INSERT INTO designs (name, type, dimensions, colors, rod, creation_date, unit_label) VALUES (?, ?, ?, ?, ?, ?, ?)',
-              (name, design_type, json.dumps(dimensions), json.dumps(colors), rod, datetime.now().isoformat(), units))
+    c.execute('BEGIN IMMEDIATE')  # as in save_design
+    c.execute('SELECT design_id FROM design_versions WHERE name = ? AND version = ?', (name, version))
+    target = c.fetchone()
+    if not target:
+        conn.close()
+        return None
+    latest = _latest(c, name)
+    if latest and latest[0] == target[0]:
+        conn.close()
+        return latest[1]
+    new_version = _add_version(c, name, target[0], datetime.now().isoformat())
     conn.commit()
     conn.close()
-    logging.info(f'Saved design: {name}')
+    logger.info('Rolled back design: %s to v%d as v%d', name, version, new_version)
+    return new_version
 
-init_db()
+def diff_versions(old, new):
+    """
+    Field-level diff between two design rows (as returned by get_design_version).
+    Returns: dict field -> {'from': old value, 'to': new value} for changed fields only
+    """
+    def fields(row):
+        _, _, design_type, dims_json, colors_json, rod, _, unit_label = row
+        flat = {'type': design_type, 'colors': json.loads(colors_json), 'rod': rod, 'unit_label': unit_label}
+        for k, v in json.loads(dims_json).items():
+            flat[f'dimensions.{k}'] = v
+        return flat
+    a, b = fields(old), fields(new)
+    return {k: {'from': a.get(k), 'to': b.get(k)} for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k)}
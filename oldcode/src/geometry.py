@@ -0,0 +1,110 @@
+import json
+import struct
+from src.palette import get_palette
+
+GEOMETRY_MAGIC = b'KLG1'
+
+def design_geometry(design_type, dimensions, colors):
+    """
+    Panel geometry for a design in design units (cm), origin top-left, y pointing down.
+    Shared by the SVG/PDF renderers and the /geometry endpoint so they always agree.
+    Colors are resolved through the fabric palette, so fills are the hex values of buyable colors.
+    Args: design_type (str), dimensions (dict), colors (list)
+    Returns: dict with panels (points, fill, optional radius), lines, circles, width, height and stroke colour
+    """
+    gore = dimensions.get('gore', 8 if design_type == 'spinner' else 6)
+    palette = get_palette()
+    colors = [palette.resolve(c).hex for c in colors]
+    primary = colors[0] if colors else palette.resolve('red').hex
+    secondary = colors[1] if len(colors) > 1 else palette.resolve('black').hex
+    panels, lines, circles = [], [], []
+    if design_type == 'tail':
+        length = dimensions['length']
+        width = dimensions['width']
+        panels.append({'points': [(0, 0), (length, 0), (length, width), (0, width)], 'fill': primary, 'radius': width / 2})
+    elif design_type == 'drogue':
+        entry_dia = dimensions['entry_diameter']
+        outlet_dia = dimensions['outlet_diameter']
+        length = dimensions['length']
+        panels.append({'points': [(0, 0), (length, (entry_dia - outlet_dia) / 2), (length, (entry_dia + outlet_dia) / 2), (0, entry_dia)], 'fill': primary})
+        for i in range(1, gore):
+            gore_x = i * (length / gore)
+            gore_height = entry_dia - (entry_dia - outlet_dia) * gore_x / length
+            lines.append((gore_x, (entry_dia - gore_height) / 2, gore_x, (entry_dia - gore_height) / 2 + gore_height))
+    elif design_type == 'spinner':
+        entry_dia = dimensions['entry_diameter']
+        length = dimensions['length']
+        for i in range(gore):
+            start_x = i * (length / gore)
+            end_x = (i + 1) * (length / gore)
+            start_height = entry_dia - (entry_dia * i / gore)
+            end_height = entry_dia - (entry_dia * (i + 1) / gore)
+            panels.append({'points': [(start_x, (entry_dia - start_height) / 2), (end_x, (entry_dia - end_height) / 2),
+                                      (end_x, (entry_dia + end_height) / 2), (start_x, (entry_dia + start_height) / 2)],
+                           'fill': colors[i % len(colors)]})
+        circles.append({'cx': 0, 'cy': entry_dia / 2, 'r': entry_dia / 2, 'stroke_width': 5})
+    elif design_type == 'graded_tail':
+        length = dimensions['length']
+        width = dimensions['width']
+        for i in range(gore):
+            start_x = i * (length / gore)
+            end_x = (i + 1) * (length / gore)
+            start_width = width - (width * 0.75 * i / gore)
+            end_width = width - (width * 0.75 * (i + 1) / gore)
+            panels.append({'points': [(start_x, 0), (end_x, 0), (end_x, end_width), (start_x, start_width)],
+                           'fill': colors[i % len(colors)]})
+    return {
+        'panels': panels,
+        'lines': lines,
+        'circles': circles,
+        'stroke': secondary,
+        'width': dimensions.get('length', 100),
+        'height': dimensions.get('width', dimensions.get('entry_diameter', 10)),
+    }
+
+def quantized_geometry(geometry, quantum=0.1):
+    """
+    Compact JSON form: coordinates as integers in multiples of quantum (default 1 mm), flattened per panel.
+    Args: geometry (dict from design_geometry), quantum (float, cm)
+    Returns: dict ready for jsonify
+    """
+    def q(v):
+        return int(round(v / quantum))
+    return {
+        'q': quantum,
+        'w': q(geometry['width']),
+        'h': q(geometry['height']),
+        's': geometry['stroke'],
+        'p': [{'f': p['fill'], 'v': [q(c) for pt in p['points'] for c in pt], **({'r': q(p['radius'])} if 'radius' in p else {})}
+              for p in geometry['panels']],
+        'l': [q(c) for line in geometry['lines'] for c in line],
+        'c': [[q(c['cx']), q(c['cy']), q(c['r'])] for c in geometry['circles']],
+    }
+
+def packed_geometry(geometry):
+    """
+    Binary form for the client visualizer, all little-endian:
+      'KLG1', uint32 meta_len, meta JSON (utf-8, zero-padded to 4 bytes),
+      float32 panel vertices (x, y pairs, panels back to back), float32 lines (x1, y1, x2, y2),
+      float32 circles (cx, cy, r).
+    The meta JSON carries counts, fills, radii, stroke and bounding box.
+    Args: geometry (dict from design_geometry)
+    Returns: bytes
+    """
+    panels = geometry['panels']
+    meta = {
+        'width': geometry['width'],
+        'height': geometry['height'],
+        'stroke': geometry['stroke'],
+        'counts': [len(p['points']) for p in panels],
+        'fills': [p['fill'] for p in panels],
+        'radii': [p.get('radius', 0) for p in panels],
+        'lines': len(geometry['lines']),
+        'circles': len(geometry['circles']),
+    }
+    meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+    meta_bytes += b'\0' * (-len(meta_bytes) % 4)
+    floats = [c for p in panels for pt in p['points'] for c in pt]
+    floats += [c for line in geometry['lines'] for c in line]
+    floats += [v for c in geometry['circles'] for v in (c['cx'], c['cy'], c['r'])]
+    return GEOMETRY_MAGIC + struct.pack('<I', len(meta_bytes)) + meta_bytes + struct.pack(f'<{len(floats)}f', *floats)
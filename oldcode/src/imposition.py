@@ -0,0 +1,246 @@
+import math
+from src.cutting import offset_polygon, layout_cut_job
+from src.lookbook import PDFStreamWriter, _text
+from src.seams import design_seams, plan_cut_panels
+
+PT_PER_MM = 72 / 25.4
+# Sheet (width, height) in mm; the roll is cut to the length actually used
+SHEETS = {'a4': (210, 297), 'a3': (297, 420), 'roll': (914, 5000)}
+ROLL_TILE_LENGTH = 1000  # mm, longest tile printed on a roll
+MARGIN = 5  # mm unprintable border
+GAP = 3  # mm between tiles, for trimming
+LABEL = 5  # mm strip above each tile for its label
+MAX_TILES = 500  # per print run
+
+
+def tile_size(sheet):
+    width, height = SHEETS[sheet]
+    tile_w, tile_h = width - 2 * MARGIN, height - 2 * MARGIN - LABEL
+    if sheet == 'roll':
+        tile_h = ROLL_TILE_LENGTH
+    return tile_w, tile_h
+
+
+def design_tiles(name, job, tile_w, tile_h):
+    """
+    Cut a design's 1:1 layout into a grid of tiles, keeping only tiles with content,
+    each trimmed to the panels it shows (so a sparse last row shrinks to its content).
+    Args: name (str), job (list of (label, cut, sew) mm), tile_w, tile_h (mm)
+    Returns: list of dicts with name, row, col, rows, cols, x, y, w, h (mm, in the layout)
+    Raises ValueError when the grid has more than MAX_TILES cells.
+    """
+    boxes = []
+    for _, cut, _ in job:
+        xs, ys = [p[0] for p in cut], [p[1] for p in cut]
+        boxes.append((min(xs), min(ys), max(xs), max(ys)))
+    if not boxes:
+        return []
+    min_x, min_y = min(b[0] for b in boxes), min(b[1] for b in boxes)
+    max_x, max_y = max(b[2] for b in boxes), max(b[3] for b in boxes)
+    cols = max(1, math.ceil((max_x - min_x) / tile_w))
+    rows = max(1, math.ceil((max_y - min_y) / tile_h))
+    if rows * cols > MAX_TILES:
+        raise ValueError(f'{name} needs {rows} x {cols} tiles, more than {MAX_TILES} per print run')
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            cx0, cy0 = min_x + col * tile_w, min_y + row * tile_h
+            cx1, cy1 = cx0 + tile_w, cy0 + tile_h
+            # Union of the panel bounding boxes clipped to this cell
+            clipped = [(max(x0, cx0), max(y0, cy0), min(x1, cx1), min(y1, cy1))
+                       for x0, y0, x1, y1 in boxes if x0 < cx1 and x1 > cx0 and y0 < cy1 and y1 > cy0]
+            if not clipped:
+                continue
+            x0, y0 = min(c[0] for c in clipped), min(c[1] for c in clipped)
+            x1, y1 = max(c[2] for c in clipped), max(c[3] for c in clipped)
+            tiles.append({'name': name, 'row': row + 1, 'col': col + 1, 'rows': rows, 'cols': cols,
+                          'x': x0, 'y': y0, 'w': x1 - x0, 'h': y1 - y0})
+    return tiles
+
+
+class _Skyline:
+    """Skyline bottom-left packer for one sheet (y grows down from the top edge)."""
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.segments = [[0.0, 0.0, float(width)]]  # x, y, width
+
+    def _fit(self, i, w, h):
+        x = self.segments[i][0]
+        if x + w > self.width + 1e-9:
+            return None
+        y, remaining, j = 0.0, w, i
+        while remaining > 1e-9:
+            if j >= len(self.segments):
+                return None
+            y = max(y, self.segments[j][1])
+            remaining -= self.segments[j][2]
+            j += 1
+        return y if y + h <= self.height + 1e-9 else None
+
+    def find(self, w, h):
+        """Lowest, then leftmost position for a w x h rectangle: (y + h, x, y, i) or None."""
+        best = None
+        for i in range(len(self.segments)):
+            y = self._fit(i, w, h)
+            if y is not None and (best is None or (y + h, self.segments[i][0]) < best[:2]):
+                best = (y + h, self.segments[i][0], y, i)
+        return best
+
+    def place(self, i, x, y, w, h):
+        self.segments.insert(i, [x, y + h, w])
+        end = x + w
+        j = i + 1
+        while j < len(self.segments) and self.segments[j][0] < end - 1e-9:
+            seg = self.segments[j]
+            seg_end = seg[0] + seg[2]
+            if seg_end <= end + 1e-9:
+                del self.segments[j]
+            else:
+                seg[2], seg[0] = seg_end - end, end
+                break
+        # Merge neighbours at the same height
+        k = 0
+        while k < len(self.segments) - 1:
+            a, b = self.segments[k], self.segments[k + 1]
+            if abs(a[1] - b[1]) < 1e-9:
+                a[2] += b[2]
+                del self.segments[k + 1]
+            else:
+                k += 1
+
+
+def pack_tiles(tiles, sheet_w, sheet_h):
+    """
+    Pack tiles onto as few sheets as possible: largest first, each into the open sheet
+    where it lands lowest (skyline bottom-left), rotating by 90 degrees when that fits better.
+    Tiles take their label strip and trimming gap with them.
+    Returns: list of sheets, each a list of (tile, x, y, rotated) with x, y the tile's top-left (mm on the sheet)
+    """
+    area_w, area_h = sheet_w - 2 * MARGIN + GAP, sheet_h - 2 * MARGIN + GAP
+    skylines, sheets = [], []
+    for tile in sorted(tiles, key=lambda t: (-max(t['w'], t['h'] + LABEL), -t['w'] * t['h'])):
+        options = [(tile['w'] + GAP, tile['h'] + LABEL + GAP, False), (tile['h'] + LABEL + GAP, tile['w'] + GAP, True)]
+        placed = False
+        for skyline, sheet in zip(skylines, sheets):
+            fits = [(skyline.find(w, h), w, h, rotated) for w, h, rotated in options]
+            fits = [f for f in fits if f[0]]
+            if fits:
+                (_, x, y, i), w, h, rotated = min(fits, key=lambda f: f[0][:2])
+                skyline.place(i, x, y, w, h)
+                sheet.append((tile, MARGIN + x, MARGIN + y, rotated))
+                placed = True
+                break
+        if not placed:
+            skyline = _Skyline(area_w, area_h)
+            w, h, rotated = options[0] if options[0][0] <= area_w and options[0][1] <= area_h else options[1]
+            fit = skyline.find(w, h)
+            if fit is None:
+                raise ValueError(f"Tile {tile['name']} r{tile['row']}c{tile['col']} does not fit the sheet")
+            skyline.place(fit[3], fit[1], fit[2], w, h)
+            skylines.append(skyline)
+            sheets.append([(tile, MARGIN + fit[1], MARGIN + fit[2], rotated)])
+    return sheets
+
+
+def impose(designs, sheet='a4', seam_allowance=10):
+    """
+    Plan a shared print run for several designs.
+    Args: designs (list of (name, design_type, dimensions)), sheet (key of SHEETS), seam_allowance (mm)
+    Returns: dict with sheet, jobs (name -> cut job), sheets (packed tiles), tiles (count) and
+             separate_sheets (sheets needed when each design is printed tile per sheet on its own)
+    Raises ValueError when the run needs more than MAX_TILES tiles or a tile does not fit the sheet.
+    """
+    tile_w, tile_h = tile_size(sheet)
+    jobs, tiles = {}, []
+    for name, design_type, dimensions in designs:
+        panels = plan_cut_panels(design_seams(design_type, dimensions, seam_allowance))
+        cuts = [offset_polygon(pts, allowances) for _, pts, allowances in panels]
+        widest = max((max(p[0] for p in cut) - min(p[0] for p in cut) for cut in cuts), default=0)
+        # Lay panels out as narrow as the widest panel allows, in whole tile columns
+        roll_width = tile_w * max(1, math.ceil(widest / tile_w))
+        jobs[name] = layout_cut_job(panels, seam_allowance, roll_width)
+        tiles.extend(design_tiles(name, jobs[name], tile_w, tile_h))
+        if len(tiles) > MAX_TILES:
+            raise ValueError(f'The print run needs more than {MAX_TILES} tiles')
+    separate = 0
+    for name in jobs:
+        own = [t for t in tiles if t['name'] == name]
+        separate += len(pack_tiles(own, *SHEETS[sheet])) if sheet == 'roll' else len(own)
+    return {'sheet': sheet, 'jobs': jobs, 'sheets': pack_tiles(tiles, *SHEETS[sheet]),
+            'tiles': len(tiles), 'separate_sheets': separate}
+
+
+def _design_form(job, width, height):
+    # Full 1:1 layout in points, y flipped: cut lines solid, sew lines dashed
+    k = PT_PER_MM
+    ops = ['0 G 0.6 w\n']
+    for _, cut, _ in job:
+        ops.append(f'{cut[0][0] * k:.2f} {(height - cut[0][1]) * k:.2f} m '
+                   + ' '.join(f'{x * k:.2f} {(height - y) * k:.2f} l' for x, y in cut[1:]) + ' h S\n')
+    ops.append('0.5 G [4 2] 0 d 0.4 w\n')
+    for _, _, sew in job:
+        ops.append(f'{sew[0][0] * k:.2f} {(height - sew[0][1]) * k:.2f} m '
+                   + ' '.join(f'{x * k:.2f} {(height - y) * k:.2f} l' for x, y in sew[1:]) + ' h S\n')
+    ops.append('[] 0 d 0 g\n')
+    for label, cut, _ in job:
+        cx = sum(p[0] for p in cut) / len(cut)
+        cy = sum(p[1] for p in cut) / len(cut)
+        ops.append(f'BT /F1 10 Tf {cx * k:.2f} {(height - cy) * k:.2f} Td {_text(label)} Tj ET\n')
+    return ''.join(ops)
+
+
+def generate_imposition(plan):
+    """
+    Stream the imposed print run as one PDF, one page per sheet.
+    Each design's 1:1 drawing is a form XObject written once; tiles show a clipped
+    window of it, with a border and a label (design, row/column, layout position).
+    Args: plan (dict from impose)
+    Yields: bytes chunks of the PDF
+    """
+    k = PT_PER_MM
+    sheet_w, sheet_h = SHEETS[plan['sheet']]
+    pdf = PDFStreamWriter()
+    catalog, pages = pdf.reserve(), pdf.reserve()
+    pdf.add(f'<< /Type /Catalog /Pages {pages} 0 R >>', catalog)
+    font = pdf.add('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    fonts = pdf.add(f'<< /F1 {font} 0 R >>')
+    forms, extents = {}, {}
+    for i, (name, job) in enumerate(plan['jobs'].items()):
+        width = max((p[0] for _, cut, _ in job for p in cut), default=0)
+        height = max((p[1] for _, cut, _ in job for p in cut), default=0)
+        extents[name] = height
+        forms[name] = (f'D{i}', pdf.add_stream(_design_form(job, width, height),
+                                               f'/Type /XObject /Subtype /Form /BBox [0 0 {width * k:.2f} {height * k:.2f}] '
+                                               f'/Resources << /Font {fonts} 0 R >>'))
+        yield pdf.take()
+    xobjects = ' '.join(f'/{ref} {num} 0 R' for ref, num in forms.values())
+    kids = []
+    for placements in plan['sheets']:
+        page_h = sheet_h
+        if plan['sheet'] == 'roll':
+            page_h = max(y + (t['w'] if r else t['h'] + LABEL) for t, x, y, r in placements) + MARGIN
+        ops = []
+        for tile, x, y, rotated in placements:
+            w, h = tile['w'], tile['h']
+            ref = forms[tile['name']][0]
+            # Tile frame: origin at the tile's top-left below its label strip, y up inside
+            if rotated:
+                # Quarter turn: the label strip runs down the left edge of the placement
+                ops.append(f'q 0 1 -1 0 {x * k:.2f} {(page_h - y - w) * k:.2f} cm\n')
+            else:
+                ops.append(f'q 1 0 0 1 {x * k:.2f} {(page_h - y) * k:.2f} cm\n')
+            label = f"{tile['name']}  r{tile['row']}/{tile['rows']} c{tile['col']}/{tile['cols']}  at {tile['x']:.0f},{tile['y']:.0f} mm"
+            ops.append(f'0 g BT /F1 7 Tf 1 {-LABEL * k + 4:.2f} Td {_text(label)} Tj ET\n')
+            top = -(LABEL + h) * k
+            ops.append(f'0.7 G 0.3 w 0 {top:.2f} {w * k:.2f} {h * k:.2f} re S\n')
+            ops.append(f'0 {top:.2f} {w * k:.2f} {h * k:.2f} re W n\n')
+            # Shift the design so the tile's layout window lands in the frame
+            ops.append(f'1 0 0 1 {-tile["x"] * k:.2f} {top - (extents[tile["name"]] - tile["y"] - h) * k:.2f} cm /{ref} Do Q\n')
+        content = pdf.add_stream(''.join(ops))
+        kids.append(pdf.add(f'<< /Type /Page /Parent {pages} 0 R /MediaBox [0 0 {sheet_w * k:.2f} {page_h * k:.2f}] '
+                            f'/Contents {content} 0 R /Resources << /Font {fonts} 0 R /XObject << {xobjects} >> >> >>'))
+        yield pdf.take()
+    pdf.add(f'<< /Type /Pages /Kids [{" ".join(f"{n} 0 R" for n in kids)}] /Count {len(kids)} >>', pages)
+    pdf.close(catalog)
+    yield pdf.take()
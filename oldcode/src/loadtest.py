@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode, urlsplit
+import yaml
+
+PERCENTILES = (50, 90, 95, 99)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class HTTPConnection:
+    """
+    Tiny asyncio HTTP/1.1 client for one virtual user (keep-alive when the server allows it).
+    Bodies are read fully and discarded; only status and size are kept.
+    """
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, data=None, headers=None):
+        return await asyncio.wait_for(self._request(method, path, data, headers or {}), self.timeout)
+
+    async def _request(self, method, path, data, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = urlencode(data).encode() if data else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        if data:
+            lines.append('Content-Type: application/x-www-form-urlencoded')
+        lines += [f'{k}: {v}' for k, v in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        version, status = status_line.decode('latin-1').split(' ', 2)[:2]
+        response_headers = {}
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+        size = 0
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                chunk = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(chunk + 2)
+                size += chunk
+                if chunk == 0:
+                    break
+        elif 'content-length' in response_headers:
+            size = int(response_headers['content-length'])
+            await self.reader.readexactly(size)
+        elif method != 'HEAD' and status not in ('204', '304'):
+            size = len(await self.reader.read())
+        if version == 'HTTP/1.0' or response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return int(status), size
+
+
+class Stats:
+    """Latencies and errors per route, plus a per-interval throughput curve."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = time.monotonic()
+        self.routes = {}
+        self.buckets = {}
+
+    def record(self, route, latency, ok, status):
+        entry = self.routes.setdefault(route, {'latencies': [], 'errors': 0, 'statuses': {}})
+        entry['latencies'].append(latency)
+        entry['errors'] += not ok
+        entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+        bucket = self.buckets.setdefault(int((time.monotonic() - self.start) // self.interval),
+                                         {'requests': 0, 'errors': 0, 'latencies': []})
+        bucket['requests'] += 1
+        bucket['errors'] += not ok
+        bucket['latencies'].append(latency)
+
+    def report(self, elapsed):
+        routes = {}
+        for route, entry in sorted(self.routes.items()):
+            latencies = sorted(entry['latencies'])
+            routes[route] = {
+                'requests': len(latencies),
+                'error_rate': round(entry['errors'] / len(latencies), 4),
+                'statuses': entry['statuses'],
+                **{f'p{p}_ms': round(_percentile(latencies, p) * 1000, 1) for p in PERCENTILES},
+                'max_ms': round(latencies[-1] * 1000, 1),
+                'rps': round(len(latencies) / elapsed, 2),
+            }
+        curve = []
+        for i in sorted(self.buckets):
+            bucket = self.buckets[i]
+            curve.append({
+                't': i * self.interval,
+                'rps': round(bucket['requests'] / self.interval, 2),
+                'error_rate': round(bucket['errors'] / bucket['requests'], 4),
+                'p95_ms': round(_percentile(sorted(bucket['latencies']), 95) * 1000, 1),
+            })
+        total = sum(r['requests'] for r in routes.values())
+        errors = sum(e['errors'] for e in self.routes.values())
+        return {'elapsed': round(elapsed, 2), 'requests': total, 'rps': round(total / elapsed, 2) if elapsed else 0,
+                'error_rate': round(errors / total, 4) if total else 0, 'routes': routes, 'curve': curve}
+
+
+def _percentile(values, p):
+    # Nearest-rank percentile of a sorted list
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+
+def _fill(value, variables):
+    if isinstance(value, str):
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {k: _fill(v, variables) for k, v in value.items()}
+    return value
+
+
+async def virtual_user(user, scenario, stats, deadline, delay):
+    """Run weighted flows back to back until the deadline, pausing think_time between steps."""
+    await asyncio.sleep(delay)
+    url = urlsplit(scenario['base_url'])
+    conn = HTTPConnection(url.hostname, url.port or 80, scenario.get('timeout', 30))
+    flows = scenario['flows']
+    names, weights = list(flows), [flows[n].get('weight', 1) for n in flows]
+    think_min, think_max = scenario.get('think_time', [0.5, 2.0])
+    # Distinct client address per user, so per-client admission buckets see many clients (needs ADMISSION_TRUST_PROXY)
+    headers = {'X-Forwarded-For': f'10.{user >> 16 & 255}.{user >> 8 & 255}.{user & 255}'} \
+        if scenario.get('forwarded_for') else {}
+    try:
+        for iteration in itertools.count():
+            flow = flows[random.choices(names, weights)[0]]
+            design = random.choice(scenario.get('designs', [{}]))
+            variables = {**scenario.get('variables', {}), **design,
+                         'user': user, 'iteration': iteration, 'name': f'load-{user}-{iteration}'}
+            for step in flow['steps']:
+                if time.monotonic() >= deadline:
+                    return
+                method = step.get('method', 'GET')
+                path = _fill(step['path'], variables)
+                route = step.get('route') or f"{method} {path.split('?', 1)[0]}"
+                started = time.monotonic()
+                try:
+                    status, _ = await conn.request(method, path, _fill(step.get('data'), variables), headers)
+                    ok = status < 400
+                except (OSError, ConnectionError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    status, ok = 'error', False
+                    await conn.close()
+                stats.record(route, time.monotonic() - started, ok, status)
+                await asyncio.sleep(random.uniform(think_min, think_max))
+    finally:
+        await conn.close()
+
+
+async def run_scenario(scenario):
+    """
+    Run a scenario: users virtual users, started evenly over ramp_up seconds, for duration seconds.
+    Returns: report dict (see Stats.report)
+    """
+    users = scenario.get('users', 10)
+    duration = scenario.get('duration', 60)
+    ramp_up = scenario.get('ramp_up', 0)
+    stats = Stats(scenario.get('interval', 5))
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(virtual_user(u, scenario, stats, deadline, ramp_up * u / users) for u in range(users)))
+    return stats.report(time.monotonic() - stats.start)
+
+
+def start_app(port, trust_proxy=False):
+    """
+    Start the app locally with the threaded Flask server and wait until it answers.
+    It runs in a temporary working directory on a copy of designs.db (browse flows read
+    existing designs), so the designs and artifacts a run creates are thrown away afterwards.
+    Returns: (process, working directory), for stop_app
+    """
+    workdir = tempfile.mkdtemp(prefix='kite-loadtest-')
+    os.symlink(os.path.join(APP_DIR, 'projects'), os.path.join(workdir, 'projects'))
+    if os.path.exists(os.path.join(APP_DIR, 'designs.db')):
+        shutil.copyfile(os.path.join(APP_DIR, 'designs.db'), os.path.join(workdir, 'designs.db'))
+    env = dict(os.environ, ADMISSION_TRUST_PROXY='1') if trust_proxy else None
+    process = subprocess.Popen([sys.executable, '-m', 'flask', '--app', os.path.join(APP_DIR, 'app.py'), 'run',
+                                '--port', str(port), '--no-reload'],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            asyncio.run(HTTPConnection('127.0.0.1', port, 1).request('GET', '/help'))
+            return process, workdir
+        except (OSError, ConnectionError, asyncio.TimeoutError):
+            time.sleep(0.1)
+    stop_app(process, workdir)
+    raise RuntimeError(f'App did not start on port {port}')
+
+
+def stop_app(process, workdir):
+    process.terminate()
+    process.wait()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(report):
+    print(f"{report['requests']} requests in {report['elapsed']}s: {report['rps']} req/s, "
+          f"{report['error_rate']:.2%} errors")
+    print(f'{"route":<28} {"reqs":>6} {"err%":>6} ' + ' '.join(f'{f"p{p}":>7}' for p in PERCENTILES) + f' {"max":>7}  ms')
+    for route, r in report['routes'].items():
+        print(f'{route:<28} {r["requests"]:>6} {r["error_rate"]:>6.1%} '
+              + ' '.join(f'{r[f"p{p}_ms"]:>7}' for p in PERCENTILES) + f' {r["max_ms"]:>7}')
+    print('\nthroughput curve')
+    for point in report['curve']:
+        print(f'  t={point["t"]:>5}s  {point["rps"]:>7} req/s  {point["error_rate"]:>6.1%} errors  p95 {point["p95_ms"]} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay wizard traffic from a scenario YAML against a local app.')
+    parser.add_argument('scenario', help='Scenario YAML, e.g. scenarios/wizard_peak.yaml')
+    parser.add_argument('--users', type=int, help='Override the number of virtual users')
+    parser.add_argument('--duration', type=float, help='Override the duration (s)')
+    parser.add_argument('--start', type=int, metavar='PORT', help='Start the app on this port for the run, on a throwaway copy of designs.db')
+    parser.add_argument('--json', help='Also write the report as JSON to this file')
+    args = parser.parse_args()
+
+    with open(args.scenario, 'r') as f:
+        scenario = yaml.safe_load(f)
+    if args.users:
+        scenario['users'] = args.users
+    if args.duration:
+        scenario['duration'] = args.duration
+    app = None
+    if args.start:
+        scenario['base_url'] = f'http://127.0.0.1:{args.start}'
+        app = start_app(args.start, scenario.get('forwarded_for', False))
+    try:
+        report = asyncio.run(run_scenario(scenario))
+    finally:
+        if app:
+            stop_app(*app)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
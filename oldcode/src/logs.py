@@ -0,0 +1,145 @@
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import uuid
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has; anything else was passed via extra= and goes into the JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id and any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class RequestContextFilter(logging.Filter):
+    """Tag records with the current request id (runs in the request thread, before queueing)."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id') and has_request_context():
+            record.request_id = g.get('request_id')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in every N DEBUG records per call site; higher levels always pass."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, int(every))
+        self.counters = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        site = (record.pathname, record.lineno)
+        counter = self.counters.get(site)
+        if counter is None:
+            counter = self.counters.setdefault(site, itertools.count())
+        n = next(counter)  # atomic under the GIL
+        if n % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: when the queue is full the record is dropped and counted."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock prepare() formats the whole record here and folds the traceback into msg.
+        # Only merge args and render the traceback to text (exc_info holds frames); JSON is built by the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config):
+    """
+    Route all logging through a bounded queue to a background writer thread.
+    Request threads only filter the record, merge its args and enqueue it; JSON
+    formatting and I/O happen in the QueueListener thread.
+    Config keys: LOG_LEVEL, LOG_LEVELS (logger name -> level), LOG_DEBUG_SAMPLE_EVERY,
+                 LOG_QUEUE_SIZE, LOG_FILE (stderr when empty)
+    Returns: logging.handlers.QueueListener (already started, stopped at exit)
+    """
+    log_file = config.get('LOG_FILE')
+    output = logging.FileHandler(log_file) if log_file else logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(config.get('LOG_QUEUE_SIZE', 10000))
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(config.get('LOG_DEBUG_SAMPLE_EVERY', 100)))
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    for name, level in config.get('LOG_LEVELS', {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def init_request_logging(app):
+    """Give each request an id (X-Request-ID, generated when absent) and log one timing record per request."""
+    access = logging.getLogger('kite_laundry.access')
+
+    @app.before_request
+    def _start_timer():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        response.headers['X-Request-ID'] = g.request_id
+        if access.isEnabledFor(logging.INFO):
+            access.info('%s %s %d', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - g.request_start) * 1000, 2),
+            })
+        return response
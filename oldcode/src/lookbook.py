@@ -0,0 +1,181 @@
+import json
+import zlib
+from reportlab.lib.pagesizes import A4
+from src.geometry import design_geometry
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 36
+HEADER_HEIGHT = 40
+FOOTER_HEIGHT = 40
+COLUMNS, ROWS = 2, 3
+CELL_WIDTH = (PAGE_WIDTH - 2 * MARGIN) / COLUMNS
+CELL_HEIGHT = (PAGE_HEIGHT - 2 * MARGIN - HEADER_HEIGHT - FOOTER_HEIGHT) / ROWS
+PREVIEW_WIDTH, PREVIEW_HEIGHT = CELL_WIDTH - 20, CELL_HEIGHT - 60
+KAPPA = 0.5523  # cubic Bezier control distance for a quarter circle
+
+
+class PDFStreamWriter:
+    """
+    Minimal PDF writer that emits each object as soon as it is complete.
+    Only the xref offsets (one int per object) are kept, so memory does not grow
+    with page content. Output is collected in chunks; take() hands them over.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+        self.offsets = {}
+        self.next_num = 1
+        self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _emit(self, data):
+        self.chunks.append(data)
+        self.offset += len(data)
+
+    def reserve(self):
+        num = self.next_num
+        self.next_num += 1
+        return num
+
+    def add(self, body, num=None):
+        num = num or self.reserve()
+        self.offsets[num] = self.offset
+        self._emit(b'%d 0 obj\n%s\nendobj\n' % (num, body.encode('latin-1') if isinstance(body, str) else body))
+        return num
+
+    def add_stream(self, content, entries='', num=None):
+        data = zlib.compress(content.encode('latin-1'), 6)
+        return self.add(b'<< /Length %d /Filter /FlateDecode %s >>\nstream\n%s\nendstream'
+                        % (len(data), entries.encode('latin-1'), data), num)
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+    def close(self, root):
+        xref = self.offset
+        count = self.next_num
+        lines = [f'xref\n0 {count}\n', '0000000000 65535 f \n']
+        lines += [f'{self.offsets.get(n, 0):010d} 00000 n \n' for n in range(1, count)]
+        lines.append(f'trailer\n<< /Size {count} /Root {root} 0 R >>\nstartxref\n{xref}\n%%EOF\n')
+        self._emit(''.join(lines).encode('latin-1'))
+
+
+def _text(value):
+    # PDF literal string in WinAnsi; unsupported characters become '?'
+    value = str(value).encode('cp1252', errors='replace').decode('latin-1')
+    return '(' + value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def _header_form(title):
+    top = PAGE_HEIGHT - MARGIN
+    return (f'BT /F2 16 Tf {MARGIN} {top - 18} Td {_text(title)} Tj ET\n'
+            f'0.6 G 0.5 w {MARGIN} {top - 28} m {PAGE_WIDTH - MARGIN} {top - 28} l S\n')
+
+
+def _palette_form(palette):
+    # Legend strip of colors.yaml swatches along the bottom of every page
+    ops = [f'0.6 G 0.5 w {MARGIN} {MARGIN + FOOTER_HEIGHT - 6} m {PAGE_WIDTH - MARGIN} {MARGIN + FOOTER_HEIGHT - 6} l S\n']
+    step = (PAGE_WIDTH - 2 * MARGIN) / max(len(palette.colors), 1)
+    for i, color in enumerate(palette.colors.values()):
+        x = MARGIN + i * step
+        ops.append(f'{color.pdf} rg 0.3 G {x:.2f} {MARGIN + 12} {step - 4:.2f} 12 re B\n')
+        ops.append(f'0 g BT /F1 5 Tf {x:.2f} {MARGIN + 5} Td {_text(color.code)} Tj ET\n')
+    return ''.join(ops)
+
+
+def _preview_form(design_type, dimensions, colors, palette):
+    """Design drawing scaled into the preview box; y flipped from geometry's y-down."""
+    geometry = design_geometry(design_type, dimensions, colors)
+    width = max(geometry['width'], 1e-6)
+    height = max(geometry['height'], 1e-6)
+    scale = min(PREVIEW_WIDTH / width, PREVIEW_HEIGHT / height)
+    box_h = height * scale
+
+    def pt(x, y):
+        return f'{x * scale:.2f} {box_h - y * scale:.2f}'
+
+    ops = [f'{palette.resolve(geometry["stroke"]).pdf} RG 0.5 w\n']
+    for panel in geometry['panels']:
+        points = panel['points']
+        ops.append(f'{palette.resolve(panel["fill"]).pdf} rg {pt(*points[0])} m ' + ' '.join(f'{pt(x, y)} l' for x, y in points[1:]) + ' h B\n')
+    for x1, y1, x2, y2 in geometry['lines']:
+        ops.append(f'q 0 G {pt(x1, y1)} m {pt(x2, y2)} l S Q\n')
+    for circle in geometry['circles']:
+        cx, cy, r = circle['cx'] * scale, box_h - circle['cy'] * scale, circle['r'] * scale
+        k = r * KAPPA
+        ops.append(f'{circle["stroke_width"] / 2} w {cx + r:.2f} {cy:.2f} m '
+                   f'{cx + r:.2f} {cy + k:.2f} {cx + k:.2f} {cy + r:.2f} {cx:.2f} {cy + r:.2f} c '
+                   f'{cx - k:.2f} {cy + r:.2f} {cx - r:.2f} {cy + k:.2f} {cx - r:.2f} {cy:.2f} c '
+                   f'{cx - r:.2f} {cy - k:.2f} {cx - k:.2f} {cy - r:.2f} {cx:.2f} {cy - r:.2f} c '
+                   f'{cx + k:.2f} {cy - r:.2f} {cx + r:.2f} {cy - k:.2f} {cx + r:.2f} {cy:.2f} c S\n')
+    return ''.join(ops), width * scale, box_h
+
+
+def generate_lookbook(designs, palette, title='Kite Laundry Lookbook'):
+    """
+    Stream a catalog PDF of many designs, six per A4 page.
+
+    Fonts, the header and the colors.yaml legend are written once and reused on
+    every page (form XObjects); each distinct design drawing is also a form, so
+    repeats (e.g. the same shape saved under two names) cost one object. Pages are
+    yielded as they are finished, keeping memory bounded for any number of designs.
+    Args: designs (iterable of design rows, as get_latest_designs), palette (Palette), title (str)
+    Yields: bytes chunks of the PDF
+    """
+    pdf = PDFStreamWriter()
+    catalog, pages = pdf.reserve(), pdf.reserve()
+    pdf.add(f'<< /Type /Catalog /Pages {pages} 0 R >>', catalog)
+    regular = pdf.add('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    bold = pdf.add('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+    fonts = pdf.add(f'<< /F1 {regular} 0 R /F2 {bold} 0 R >>')
+    resources = f'/Resources << /Font {fonts} 0 R >>'
+    form = f'/Type /XObject /Subtype /Form /BBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] {resources}'
+    shared = {'Header': pdf.add_stream(_header_form(title), form),
+              'Legend': pdf.add_stream(_palette_form(palette), form)}
+    previews = {}  # (type, dimensions, colors) -> (object number, width, height)
+    kids = []
+    yield pdf.take()
+
+    def write_page(cells, page_number):
+        ops = ['/Header Do /Legend Do\n']
+        used = {}
+        for i, (name, design_type, dimensions, colors, preview) in enumerate(cells):
+            num, w, h = preview
+            used[f'D{num}'] = num
+            x = MARGIN + (i % COLUMNS) * CELL_WIDTH + 10
+            y = PAGE_HEIGHT - MARGIN - HEADER_HEIGHT - (i // COLUMNS + 1) * CELL_HEIGHT
+            dims = ', '.join(f'{k}: {v:g}' if k == 'gore' else f'{k}: {v:g} cm' for k, v in dimensions.items())
+            ops.append(f'0 g BT /F2 11 Tf {x:.2f} {y + CELL_HEIGHT - 16:.2f} Td {_text(name)} Tj '
+                       f'/F1 8 Tf 0 -12 Td {_text(design_type.replace("_", " ").capitalize() + " - " + dims)} Tj ET\n')
+            ops.append(f'q 1 0 0 1 {x:.2f} {y + 10 + (PREVIEW_HEIGHT - h) / 2:.2f} cm /D{num} Do Q\n')
+            for j, color in enumerate(colors):
+                ops.append(f'{palette.resolve(color).pdf} rg 0 G 0.3 w {x + j * 14:.2f} {y + CELL_HEIGHT - 44:.2f} 10 8 re B\n')
+        ops.append(f'0 g BT /F1 8 Tf {PAGE_WIDTH - MARGIN - 40} {MARGIN - 14} Td {_text(f"Page {page_number}")} Tj ET\n')
+        xobjects = ' '.join(f'/{k} {v} 0 R' for k, v in {**shared, **used}.items())
+        content = pdf.add_stream(''.join(ops))
+        kids.append(pdf.add(f'<< /Type /Page /Parent {pages} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                            f'/Contents {content} 0 R /Resources << /Font {fonts} 0 R /XObject << {xobjects} >> >> >>'))
+
+    cells = []
+    for design in designs:
+        name, design_type = design[1], design[2]
+        dimensions, colors = json.loads(design[3]), json.loads(design[4])
+        key = (design_type, json.dumps(dimensions, sort_keys=True), tuple(colors))
+        if key not in previews:
+            try:
+                ops, w, h = _preview_form(design_type, dimensions, colors, palette)
+            except (KeyError, ValueError, ZeroDivisionError):
+                continue  # incomplete legacy rows
+            previews[key] = (pdf.add_stream(ops, f'/Type /XObject /Subtype /Form /BBox [0 0 {w:.2f} {h:.2f}]'), w, h)
+        cells.append((name, design_type, dimensions, colors, previews[key]))
+        if len(cells) == COLUMNS * ROWS:
+            write_page(cells, len(kids) + 1)
+            cells = []
+            yield pdf.take()
+    if cells or not kids:
+        write_page(cells, len(kids) + 1)
+    pdf.add(f'<< /Type /Pages /Kids [{" ".join(f"{k} 0 R" for k in kids)}] /Count {len(kids)} >>', pages)
+    pdf.close(catalog)
+    yield pdf.take()
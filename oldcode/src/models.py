@@ -1,5 +1,13 @@
 rod_types = ['none', 'carbon', 'fiberglass', 'bamboo']
 
+# Input bounds for the configure form and previews
+MAX_DIMENSION = 10000  # cm
+GORE_RANGE = (3, 64)
+MAX_COLORS = 3
+# Cut files and seam plans
+MAX_SEAM_ALLOWANCE = 100  # mm
+MAX_ROLL_WIDTH = 10000  # mm
+
 design_principles = {
     'tail': {
         'description': 'Simple pipe tail for stability. Recommended length-to-width ratio: 10:1. Icarex ripstop material.',
@@ -0,0 +1,470 @@
+import bisect
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from flask import request, Response
+from werkzeug.wsgi import wrap_file
+
+from src.storage import MIMETYPES
+
+logger = logging.getLogger(__name__)
+
+# Pack record: magic, flags, key length, tag length, data length, key, tag, data
+RECORD_MAGIC = b'KLPR'
+RECORD_HEADER = struct.Struct('<4sBHHQ')
+FLAG_TOMBSTONE = 1
+
+# Index: magic, entry count, pack count, (pack id, indexed length) per pack, then sorted entries
+INDEX_MAGIC = b'KLIX'
+INDEX_HEADER = struct.Struct('<4sII')
+INDEX_PACK = struct.Struct('<IQ')
+INDEX_ENTRY = struct.Struct('<32sIQQ')  # sha256(key), pack id, data offset, data length
+
+
+class _IndexDigests:
+    """Sequence view of the digests in a mapped index, for bisect."""
+
+    def __init__(self, buf, start, count):
+        self.buf, self.start, self.count = buf, start, count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        pos = self.start + i * INDEX_ENTRY.size
+        return self.buf[pos:pos + 32]
+
+
+class _BoundedReader:
+    """The next `remaining` bytes of an open pack file, so a file wrapper stops at the artifact's end."""
+
+    def __init__(self, f, remaining):
+        self.f, self.remaining = f, remaining
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+class PackArtifactStore:
+    """
+    Artifacts appended to a few large pack files instead of one file each.
+
+    A sorted index of sha256(key) -> (pack, offset, length) is memory-mapped and
+    binary-searched, so lookups touch no extra inodes and startup does not read the
+    archive. Records appended since the index was last written are recovered by
+    scanning pack tails. Blobs are served straight from the pack file through the
+    WSGI file wrapper, which gunicorn turns into sendfile() bounded by Content-Length.
+
+    Puts may carry a tag (e.g. 'pdf:<design name>'); when a newer key is stored under
+    the same tag the older one is superseded, and compact() drops superseded and
+    overwritten records. Appends and compaction take an flock so several workers
+    can share one directory.
+    """
+
+    def __init__(self, root, max_pack_size=1 << 30, flush_every=1024):
+        self.root = root
+        self.max_pack_size = max_pack_size
+        self.flush_every = flush_every
+        self.lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        self._index_map = None
+        self._index_count = 0
+        self._index_stat = None
+        self._pack_maps = {}
+        self._load()
+
+    # -- paths and locking -------------------------------------------------
+
+    def _pack_path(self, pack_id):
+        return os.path.join(self.root, f'pack-{pack_id:06d}.pack')
+
+    def _pack_ids(self):
+        return sorted(int(f[5:11]) for f in os.listdir(self.root) if f.startswith('pack-') and f.endswith('.pack'))
+
+    def _flock(self):
+        lock_file = open(os.path.join(self.root, 'pack.lock'), 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    # -- loading -------------------------------------------------------------
+
+    def _load(self):
+        """(Re)map the index and recover records appended after it was written."""
+        # Pack maps are dropped, not closed: get() may have handed out memoryviews into them
+        self._pack_maps = {}
+        if self._index_map is not None:
+            self._index_map.close()
+        self._index_map, self._index_count = None, 0
+        self._overlay = {}
+        self._scanned = {}
+        index_path = os.path.join(self.root, 'index.idx')
+        try:
+            with open(index_path, 'rb') as f:
+                self._index_stat = os.fstat(f.fileno())
+                if self._index_stat.st_size:
+                    self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            self._index_stat = None
+        if self._index_map is not None:
+            magic, self._index_count, pack_count = INDEX_HEADER.unpack_from(self._index_map, 0)
+            if magic != INDEX_MAGIC:
+                raise ValueError(f'{index_path} is not a pack index')
+            pos = INDEX_HEADER.size
+            for _ in range(pack_count):
+                pack_id, indexed = INDEX_PACK.unpack_from(self._index_map, pos)
+                self._scanned[pack_id] = indexed
+                pos += INDEX_PACK.size
+            self._entries_start = pos
+        try:
+            with open(os.path.join(self.root, 'tags.json')) as f:
+                self._tags = json.load(f)
+        except FileNotFoundError:
+            self._tags = {}
+        self._scan_tails()
+
+    def _scan_tails(self):
+        for pack_id in self._pack_ids():
+            path = self._pack_path(pack_id)
+            size = os.path.getsize(path)
+            pos = self._scanned.get(pack_id, 0)
+            if pos >= size:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(pos)
+                while pos + RECORD_HEADER.size <= size:
+                    magic, flags, key_len, tag_len, data_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                    if magic != RECORD_MAGIC:
+                        logger.warning('Corrupt pack record in %s at %d, ignoring the rest', path, pos)
+                        break
+                    key = f.read(key_len).decode('utf-8')
+                    tag = f.read(tag_len).decode('utf-8') or None
+                    data_offset = pos + RECORD_HEADER.size + key_len + tag_len
+                    if data_offset + data_len > size:
+                        break  # partially written record, another writer is still appending
+                    self._apply(key, tag, None if flags & FLAG_TOMBSTONE else (pack_id, data_offset, data_len))
+                    pos = data_offset + data_len
+                    f.seek(pos)
+            self._scanned[pack_id] = pos
+
+    def _apply(self, key, tag, location):
+        self._overlay[hashlib.sha256(key.encode('utf-8')).digest()] = location
+        if tag and location is not None:
+            self._tags[tag] = key
+
+    def _refresh(self):
+        """Pick up a new index written by another process, then any new appends."""
+        try:
+            stat = os.stat(os.path.join(self.root, 'index.idx'))
+        except FileNotFoundError:
+            stat = None
+        current = self._index_stat
+        if (stat is None) != (current is None) or (stat and (stat.st_ino, stat.st_mtime_ns) != (current.st_ino, current.st_mtime_ns)):
+            self._load()
+        else:
+            self._scan_tails()
+
+    # -- lookup --------------------------------------------------------------
+
+    def _index_lookup(self, digest):
+        if self._index_map is None:
+            return None
+        digests = _IndexDigests(self._index_map, self._entries_start, self._index_count)
+        i = bisect.bisect_left(digests, digest)
+        if i < self._index_count:
+            entry_digest, pack_id, offset, length = INDEX_ENTRY.unpack_from(self._index_map, self._entries_start + i * INDEX_ENTRY.size)
+            if entry_digest == digest:
+                return pack_id, offset, length
+        return None
+
+    def _locate(self, key, refresh=True):
+        digest = hashlib.sha256(key.encode('utf-8')).digest()
+        with self.lock:
+            if digest in self._overlay:
+                return self._overlay[digest]
+            location = self._index_lookup(digest)
+            if location is None and refresh:
+                self._refresh()
+                return self._locate(key, refresh=False)
+            return location
+
+    def exists(self, key):
+        return self._locate(key) is not None
+
+    def _reload(self):
+        """Remap the index after a pack vanished, waiting for a compaction still holding the flock."""
+        with self.lock:
+            lock_file = self._flock()
+            try:
+                self._load()
+            finally:
+                lock_file.close()
+
+    def get(self, key):
+        """
+        Returns: memoryview into the mapped pack (no copy), or None.
+        Keys are content hashes, so a location only moves when another process compacts;
+        a pack that is gone by then triggers one reload and a second lookup.
+        """
+        for retry in (False, True):
+            location = self._locate(key)
+            if location is None:
+                return None
+            pack_id, offset, length = location
+            with self.lock:
+                m = self._pack_maps.get(pack_id)
+                if m is None or len(m) < offset + length:
+                    try:
+                        with open(self._pack_path(pack_id), 'rb') as f:
+                            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except FileNotFoundError:
+                        if retry:
+                            raise
+                        self._reload()
+                        continue
+                    self._pack_maps[pack_id] = m
+            return memoryview(m)[offset:offset + length]
+
+    def _open(self, key):
+        """Pack file opened at the key's data (same reload-and-retry as get()), or None."""
+        for retry in (False, True):
+            location = self._locate(key)
+            if location is None:
+                return None
+            try:
+                f = open(self._pack_path(location[0]), 'rb')
+            except FileNotFoundError:
+                if retry:
+                    raise
+                self._reload()
+                continue
+            f.seek(location[1])
+            return f
+
+    # -- writing -------------------------------------------------------------
+
+    def _append(self, key, data, tag=None, flags=0):
+        key_bytes = key.encode('utf-8')
+        tag_bytes = (tag or '').encode('utf-8')
+        with self.lock:
+            lock_file = self._flock()
+            try:
+                ids = self._pack_ids()
+                pack_id = ids[-1] if ids else 1
+                path = self._pack_path(pack_id)
+                if os.path.exists(path) and os.path.getsize(path) + len(data) > self.max_pack_size:
+                    pack_id += 1
+                    path = self._pack_path(pack_id)
+                self._scan_tails()  # stay in step with other writers before appending
+                with open(path, 'ab') as f:
+                    pos = f.tell()
+                    f.write(RECORD_HEADER.pack(RECORD_MAGIC, flags, len(key_bytes), len(tag_bytes), len(data)))
+                    f.write(key_bytes)
+                    f.write(tag_bytes)
+                    f.write(data)
+                data_offset = pos + RECORD_HEADER.size + len(key_bytes) + len(tag_bytes)
+                self._apply(key, tag, None if flags & FLAG_TOMBSTONE else (pack_id, data_offset, len(data)))
+                self._scanned[pack_id] = data_offset + len(data)
+                if len(self._overlay) >= self.flush_every:
+                    self._write_index()
+            finally:
+                lock_file.close()
+
+    def put(self, key, data, tag=None):
+        self._append(key, bytes(data), tag)
+
+    def delete(self, key):
+        self._append(key, b'', flags=FLAG_TOMBSTONE)
+
+    def _entries(self):
+        """All live (digest, pack, offset, length) entries, index merged with overlay, sorted."""
+        entries = {}
+        if self._index_map is not None:
+            for i in range(self._index_count):
+                digest, pack_id, offset, length = INDEX_ENTRY.unpack_from(self._index_map, self._entries_start + i * INDEX_ENTRY.size)
+                entries[digest] = (pack_id, offset, length)
+        entries.update(self._overlay)
+        return sorted((d, *loc) for d, loc in entries.items() if loc is not None)
+
+    def _write_index(self, entries=None):
+        # Caller holds self.lock and the flock
+        entries = self._entries() if entries is None else entries
+        scanned = {pack_id: self._scanned.get(pack_id, 0) for pack_id in self._pack_ids()}
+        tmp_path = os.path.join(self.root, 'index.idx.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(entries), len(scanned)))
+            for pack_id, indexed in scanned.items():
+                f.write(INDEX_PACK.pack(pack_id, indexed))
+            for entry in entries:
+                f.write(INDEX_ENTRY.pack(*entry))
+        with open(os.path.join(self.root, 'tags.json.tmp'), 'w') as f:
+            json.dump(self._tags, f)
+        os.replace(os.path.join(self.root, 'tags.json.tmp'), os.path.join(self.root, 'tags.json'))
+        os.replace(tmp_path, os.path.join(self.root, 'index.idx'))
+        self._load()
+
+    def flush(self):
+        with self.lock:
+            lock_file = self._flock()
+            try:
+                self._scan_tails()
+                self._write_index()
+            finally:
+                lock_file.close()
+
+    # -- compaction ----------------------------------------------------------
+
+    def _superseded(self):
+        current = {hashlib.sha256(key.encode('utf-8')).digest() for key in self._tags.values()}
+        tagged = set()
+        for pack_id in self._pack_ids():
+            with open(self._pack_path(pack_id), 'rb') as f:
+                pos, size = 0, os.path.getsize(self._pack_path(pack_id))
+                while pos + RECORD_HEADER.size <= size:
+                    magic, flags, key_len, tag_len, data_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                    if magic != RECORD_MAGIC:
+                        break
+                    key = f.read(key_len)
+                    if tag_len:
+                        tagged.add(hashlib.sha256(key).digest())
+                    pos += RECORD_HEADER.size + key_len + tag_len + data_len
+                    f.seek(pos)
+        return tagged - current
+
+    def dead_ratio(self):
+        """Share of pack bytes that compact() would drop: overwritten, deleted and superseded records and all headers."""
+        with self.lock:
+            self._scan_tails()
+            total = sum(os.path.getsize(self._pack_path(p)) for p in self._pack_ids())
+            superseded = self._superseded()
+            live = sum(length for digest, _, _, length in self._entries() if digest not in superseded)
+        return 1 - live / total if total else 0.0
+
+    def compact(self):
+        """
+        Rewrite live records into fresh packs and drop overwritten, deleted and
+        superseded ones. Readers in other processes reload on their next miss, or
+        when a pack they still point at is gone (get(), serve()).
+        """
+        with self.lock:
+            lock_file = self._flock()
+            try:
+                self._scan_tails()
+                superseded = self._superseded()
+                old_ids = self._pack_ids()
+                next_id = (old_ids[-1] if old_ids else 0) + 1
+                keys = self._keys_by_digest()
+                entries = []
+                out, out_id = None, next_id
+                for digest, pack_id, offset, length in self._entries():
+                    if digest in superseded or digest not in keys:
+                        continue
+                    if out is None or out.tell() + length > self.max_pack_size:
+                        if out is not None:
+                            out.close()
+                            out_id += 1
+                        out = open(self._pack_path(out_id), 'wb')
+                    key_bytes, tag_bytes = keys[digest]
+                    with open(self._pack_path(pack_id), 'rb') as src:
+                        src.seek(offset)
+                        data = src.read(length)
+                    pos = out.tell()
+                    out.write(RECORD_HEADER.pack(RECORD_MAGIC, 0, len(key_bytes), len(tag_bytes), length))
+                    out.write(key_bytes + tag_bytes + data)
+                    entries.append((digest, out_id, pos + RECORD_HEADER.size + len(key_bytes) + len(tag_bytes), length))
+                if out is not None:
+                    out.close()
+                self._tags = {tag: key for tag, key in self._tags.items()
+                              if hashlib.sha256(key.encode('utf-8')).digest() not in superseded}
+                for pack_id in old_ids:
+                    os.remove(self._pack_path(pack_id))
+                self._scanned = {}
+                for pack_id in self._pack_ids():
+                    self._scanned[pack_id] = os.path.getsize(self._pack_path(pack_id))
+                self._write_index(sorted(entries))
+                logger.info('Compacted pack store %s: %d live artifacts, %d superseded', self.root, len(entries), len(superseded))
+            finally:
+                lock_file.close()
+
+    def _keys_by_digest(self):
+        keys = {}
+        for pack_id in self._pack_ids():
+            with open(self._pack_path(pack_id), 'rb') as f:
+                pos, size = 0, os.path.getsize(self._pack_path(pack_id))
+                while pos + RECORD_HEADER.size <= size:
+                    magic, flags, key_len, tag_len, data_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                    if magic != RECORD_MAGIC:
+                        break
+                    key = f.read(key_len)
+                    tag = f.read(tag_len)
+                    keys[hashlib.sha256(key).digest()] = (key, tag)
+                    pos += RECORD_HEADER.size + key_len + tag_len + data_len
+                    f.seek(pos)
+        return keys
+
+    def start_compactor(self, interval=300, threshold=0.3):
+        """Background thread: compact whenever more than threshold of the pack bytes are dead."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.dead_ratio() > threshold:
+                        self.compact()
+                except Exception:
+                    logger.exception('Pack store compaction failed')
+        thread = threading.Thread(target=run, name='pack-compactor', daemon=True)
+        thread.start()
+        return thread
+
+    # -- serving -------------------------------------------------------------
+
+    def serve(self, key, download_name):
+        location = self._locate(key)
+        if location is None:
+            return 'Not found', 404
+        length = location[2]
+        etag = key.rsplit('/', 1)[-1]
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        start, end, status = 0, length, 200
+        if request.range and request.range.range_for_length(length):
+            start, end = request.range.range_for_length(length)
+            status = 206
+        mimetype = MIMETYPES.get(key.rsplit('.', 1)[-1], 'application/octet-stream')
+        if 'wsgi.file_wrapper' in request.environ:
+            f = self._open(key)
+            if f is not None:
+                f.seek(start, os.SEEK_CUR)
+                # gunicorn clamps to Content-Length, so it can sendfile() straight from the pack;
+                # other wrappers may read to EOF, into the records that follow
+                if not request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn/'):
+                    f = _BoundedReader(f, end - start)
+            data = None if f is None else wrap_file(request.environ, f)
+        else:
+            # The memoryview is written as is, without copying the slice into bytes
+            view = self.get(key)
+            data = None if view is None else [view[start:end]]
+        if data is None:
+            return 'Not found', 404
+        response = Response(data, status=status, direct_passthrough=True, mimetype=mimetype)
+        response.content_length = end - start
+        response.accept_ranges = 'bytes'
+        if status == 206:
+            response.headers['Content-Range'] = f'bytes {start}-{end - 1}/{length}'
+        response.set_etag(etag)
+        response.headers['Content-Disposition'] = f'inline; filename="{download_name}"'
+        return response
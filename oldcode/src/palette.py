@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import yaml
+from reportlab.lib import colors as rl_colors
+
+COLORS_FILE = 'projects/resources/colors.yaml'
+SUPPLIERS_FILE = 'projects/resources/suppliers.yaml'
+# D65 white point and sRGB -> XYZ matrix for the Lab distance
+WHITE = np.array([0.95047, 1.0, 1.08883])
+SRGB_TO_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                        [0.2126729, 0.7151522, 0.0721750],
+                        [0.0193339, 0.1191920, 0.9503041]])
+COLOR_PATTERN = re.compile(r'#(?:[0-9a-fA-F]{3}){1,2}|[A-Za-z][A-Za-z ]{0,39}')
+MAX_RESOLVED = 4096  # memoized color strings (preview input is free text)
+
+
+def srgb_to_lab(rgb):
+    """
+    CIE Lab (D65) of sRGB colors.
+    Args: rgb (array-like (..., 3), components 0-1)
+    Returns: ndarray (..., 3) L, a, b
+    """
+    rgb = np.asarray(rgb, dtype=float)
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ SRGB_TO_XYZ.T / WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+class PaletteColor:
+    """One resolved color with its backend forms built once: hex (svgwrite), reportlab (Color) and pdf ('r g b')."""
+
+    __slots__ = ('code', 'name', 'hex', 'rgb', 'lab', 'reportlab', 'pdf')
+
+    def __init__(self, code, name, rgb):
+        self.code = code
+        self.name = name
+        self.rgb = tuple(float(c) for c in rgb)
+        self.hex = '#{:02x}{:02x}{:02x}'.format(*(round(c * 255) for c in self.rgb))
+        self.lab = tuple(srgb_to_lab(self.rgb).tolist())
+        self.reportlab = rl_colors.Color(*self.rgb)
+        self.pdf = '{:.3f} {:.3f} {:.3f}'.format(*self.rgb)
+
+    def as_dict(self):
+        return {'code': self.code, 'name': self.name, 'hex': self.hex}
+
+
+class Palette:
+    """
+    Fabric palette from colors.yaml (DPIC code -> name, hex) with supplier stock from suppliers.yaml.
+
+    Codes, names and hex values resolve to one shared PaletteColor each. Any other
+    color string (e.g. 'green' from older designs) resolves to the nearest color that
+    can be bought, so what is drawn matches the fabric. Resolutions are memoized.
+    Args: palette (dict code -> {name, hex}), suppliers (dict supplier id -> {name, materials})
+    """
+
+    def __init__(self, palette, suppliers=None):
+        self.colors = {}
+        self.index = {}
+        for code, entry in (palette or {}).items():
+            color = PaletteColor(code, entry.get('name', code), _parse(entry.get('hex', '#000000')))
+            self.colors[code] = color
+            for key in (code, color.name, color.hex):
+                self.index.setdefault(key.lower(), color)
+        self.codes = list(self.colors)
+        self.labs = np.array([c.lab for c in self.colors.values()]).reshape(-1, 3)
+        # code -> list of (supplier id, supplier name, material, price); supplier color names that
+        # are not palette names ('Blue', 'Pink') count for the closest palette color of that name
+        self.stock = {code: [] for code in self.codes}
+        for supplier_id, supplier in (suppliers or {}).items():
+            for material, offer in (supplier.get('materials') or {}).items():
+                for name in offer.get('colors') or []:
+                    color = self.index.get(name.lower()) or self._closest(name, range(len(self.codes)))
+                    if color and (supplier_id, material) not in [(s[0], s[2]) for s in self.stock[color.code]]:
+                        self.stock[color.code].append((supplier_id, supplier.get('name', supplier_id), material,
+                                                       offer.get('price')))
+        self.version = hashlib.sha256(json.dumps([palette, suppliers], sort_keys=True, default=str).encode()).hexdigest()[:12]
+        self.resolved = {}
+
+    @classmethod
+    def from_files(cls, colors_path=COLORS_FILE, suppliers_path=SUPPLIERS_FILE):
+        """Load colors.yaml and suppliers.yaml; a missing file gives an empty palette or no stock."""
+        data = []
+        for path, key in ((colors_path, 'palette'), (suppliers_path, 'suppliers')):
+            if path and os.path.isfile(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data.append((yaml.safe_load(f) or {}).get(key) or {})
+            else:
+                data.append({})
+        return cls(*data)
+
+    def resolve(self, color):
+        """
+        Palette color for a DPIC code, name or hex value; other colors snap to the nearest available one.
+        Returns: PaletteColor (the same object for the same input)
+        """
+        resolved = self.resolved.get(color)
+        if resolved is None:
+            resolved = self.index.get(str(color).lower()) or self.nearest(color) or _free_color(color)
+            if len(self.resolved) < MAX_RESOLVED:
+                self.resolved[color] = resolved
+        return resolved
+
+    def known(self, color):
+        """True for palette codes, names and hex values, and for other hex or named colors."""
+        return str(color).lower() in self.index or _read(color) is not None
+
+    def suppliers(self, color, material=None, supplier=None):
+        """Who stocks a color: list of dicts with supplier, name, material and price."""
+        code = self.resolve(color).code
+        return [{'supplier': s, 'name': n, 'material': m, 'price': p} for s, n, m, p in self.stock.get(code, [])
+                if (material is None or m == material) and (supplier is None or s == supplier)]
+
+    def available(self, material=None, supplier=None):
+        """Palette colors at least one supplier stocks (optionally of one material or supplier), in file order."""
+        return [self.colors[code] for code in self.codes
+                if any((material is None or m == material) and (supplier is None or s == supplier)
+                       for s, _, m, _ in self.stock[code])]
+
+    def nearest(self, color, material=None, supplier=None, available=True):
+        """
+        Closest palette color by Lab distance (CIE76). When the name shares a word with
+        palette names ('green' -> Forest Green, Fluor Green) only those are considered.
+        Args: color (str), material, supplier (restrict the stock), available (only colors that can be bought)
+        Returns: PaletteColor, or None when nothing qualifies
+        """
+        if available and any(self.stock.values()):
+            codes = {c.code for c in self.available(material, supplier)}
+            candidates = [i for i, code in enumerate(self.codes) if code in codes]
+        else:
+            candidates = range(len(self.codes))
+        return self._closest(color, candidates)
+
+    def _closest(self, color, candidates):
+        candidates = list(candidates)
+        if not candidates:
+            return None
+        words = set(re.findall(r'[a-z]+', str(color).lower()))
+        named = [i for i in candidates if words & set(self.colors[self.codes[i]].name.lower().split())]
+        candidates = named or candidates
+        lab = srgb_to_lab(_parse(color))
+        distance = np.sum((self.labs[candidates] - lab) ** 2, axis=1)
+        return self.colors[self.codes[candidates[int(np.argmin(distance))]]]
+
+
+@lru_cache(maxsize=256)
+def _parse(color):
+    # (r, g, b) 0-1 of a hex or named color; anything else is black
+    return _read(color) or (0.0, 0.0, 0.0)
+
+
+def _read(color):
+    # (r, g, b) 0-1 of a hex or named color, None otherwise (incl. expressions toColor would evaluate)
+    color = str(color).strip()
+    if len(color) == 4 and color.startswith('#'):
+        color = '#' + ''.join(ch * 2 for ch in color[1:])  # toColor reads #rgb as a plain number
+    if not COLOR_PATTERN.fullmatch(color):
+        return None
+    try:
+        c = rl_colors.toColor(color.replace(' ', '').lower())
+    except ValueError:
+        return None
+    return (c.red, c.green, c.blue)
+
+
+@lru_cache(maxsize=256)
+def _free_color(color):
+    return PaletteColor(None, str(color), _parse(color))
+
+
+@lru_cache(maxsize=8)
+def get_palette(colors_path=COLORS_FILE, suppliers_path=SUPPLIERS_FILE):
+    """Shared palette, loaded once per process."""
+    return Palette.from_files(colors_path, suppliers_path)
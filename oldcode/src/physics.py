@@ -0,0 +1,178 @@
+import argparse
+import json
+import math
+import numpy as np
+import yaml
+from src.unfold import surface_from_project, unfold_surface
+
+AIR_DENSITY = 1.225  # kg/m³, sea level, 15 °C
+GRAVITY = 9.81
+MAX_WIND_SPEEDS = 1000  # per ranking
+# Converting a rating to newtons
+FORCE_UNITS = {'N': 1.0, 'kg': GRAVITY, 'kgf': GRAVITY, 'lb': 0.45359237 * GRAVITY, 'daN': 10.0}
+# Rough coefficients for fabric laundry: form drag on the frontal area, and
+# skin friction on the wetted area (high for fluttering ripstop compared to a flat plate)
+FORM_DRAG = {'drogue': 1.4, 'spinner': 0.8, 'tail': 0.5, 'graded_tail': 0.0}
+SKIN_FRICTION = {'drogue': 0.02, 'spinner': 0.02, 'tail': 0.02, 'graded_tail': 0.03}
+# Project shapes (geometry.type of a project YAML): a bol is a cup open to the wind, tubes fly
+# like tails and a box frame shows one cell face; cones and free-form shapes have no estimate yet
+PROJECT_FORM_DRAG = {'bol': 1.4, 'pipe': 0.5, 'cylinder': 0.5, 'box': 1.0}
+PROJECT_SKIN_FRICTION = 0.02
+
+
+def drag_area(design_type, dimensions):
+    """
+    Effective drag area (Cd * A) of a design from its geometry.
+    Args: design_type (str), dimensions (dict, cm as stored)
+    Returns: float m²
+    """
+    d = {k: v / 100 for k, v in dimensions.items() if k != 'gore'}  # cm -> m
+    frontal = wetted = 0.0
+    if design_type == 'drogue':
+        entry, outlet, length = d['entry_diameter'], d['outlet_diameter'], d['length']
+        # Air escaping through the outlet does not load the cone
+        frontal = math.pi / 4 * (entry ** 2 - outlet ** 2)
+        wetted = math.pi * (entry + outlet) / 2 * math.hypot(length, (entry - outlet) / 2)
+    elif design_type == 'spinner':
+        entry, length = d['entry_diameter'], d['length']
+        frontal = math.pi / 4 * entry ** 2
+        wetted = math.pi * entry / 2 * math.hypot(length, entry / 2)
+    elif design_type == 'tail':
+        # The width is the tube's circumference, as cut (cutting.cut_panels) and sewn (seams.design_girth)
+        diameter = d['width'] / math.pi
+        frontal = math.pi / 4 * diameter ** 2
+        wetted = math.pi * diameter * d['length']
+    elif design_type == 'graded_tail':
+        # Ribbon: both sides, average width of the 75 % taper
+        wetted = 2 * d['length'] * d['width'] * 0.625
+    else:
+        raise ValueError(f'Unknown design type: {design_type}')
+    return FORM_DRAG[design_type] * frontal + SKIN_FRICTION[design_type] * wetted
+
+
+def surface_drag_area(kind, params):
+    """
+    Effective drag area (Cd * A) of a project shape, with the wetted area of its mesh.
+    Args: kind (str), params (tuple of (key, value), mm) as read by unfold.surface_from_project
+    Returns: float m²
+    Raises ValueError for shapes without coefficients.
+    """
+    if kind not in PROJECT_FORM_DRAG:
+        raise ValueError(f'No drag estimate for geometry type: {kind}')
+    p = dict(params)
+    if kind == 'box':
+        # Regular polygon cross-section of the frame
+        frontal = p['sides'] * p['width'] ** 2 / (4 * math.tan(math.pi / p['sides']))
+    else:
+        frontal = math.pi / 4 * p['diameter'] ** 2
+    wetted = unfold_surface(kind, params)['surface_area']
+    return (PROJECT_FORM_DRAG[kind] * frontal + PROJECT_SKIN_FRICTION * wetted) / 1e6  # mm² -> m²
+
+
+def project_drag_area(path):
+    """
+    Geometry type and drag area of a project YAML (bol, pipe, cylinder and box shapes).
+    Returns: (kind, float m²)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        kind, params = surface_from_project(yaml.safe_load(f))
+    return kind, surface_drag_area(kind, params)
+
+
+def wind_speeds(minimum=2, maximum=15, step=1):
+    """
+    Grid of wind speeds in m/s, both ends included.
+    Raises ValueError unless 0 <= minimum <= maximum with a positive step and at most MAX_WIND_SPEEDS speeds.
+    """
+    if not (math.isfinite(step) and step > 0 and 0 <= minimum <= maximum < math.inf) \
+            or (maximum - minimum) / step >= MAX_WIND_SPEEDS:
+        raise ValueError(f'wind_min <= wind_max (m/s) with step > 0 and at most {MAX_WIND_SPEEDS} speeds')
+    return np.arange(minimum, maximum + step / 2, step, dtype=float)
+
+
+def line_pull(drag_areas, speeds, rho=AIR_DENSITY):
+    """
+    Line pull for every design at every wind speed: F = 1/2 rho v² CdA, broadcast over both axes.
+    Args: drag_areas (array-like (n,) m²), speeds (array-like (w,) m/s), rho (kg/m³)
+    Returns: ndarray (n, w) newtons
+    """
+    return 0.5 * rho * np.asarray(drag_areas, dtype=float)[:, None] * np.asarray(speeds, dtype=float)[None, :] ** 2
+
+
+def rank_designs(designs, speeds, rating=None, projects=()):
+    """
+    Rank designs by line pull at the strongest wind, and flag those over a rating.
+    Args: designs (rows from get_latest_designs), speeds (array m/s), rating (float newtons, optional),
+          projects (list of (name, kind, drag area m²), e.g. from project_drag_area)
+    Returns: list of dicts (name, type, drag_area, pull (N per speed), max_pull, exceeds, limit_wind), heaviest first
+    """
+    named = list(projects)
+    for design in designs:
+        try:
+            named.append((design[1], design[2], drag_area(design[2], json.loads(design[3]))))
+        except (KeyError, ValueError):
+            continue  # incomplete legacy rows
+    if not named:
+        return []
+    pull = line_pull([area for _, _, area in named], speeds)
+    over = pull > rating if rating is not None else np.zeros(pull.shape, dtype=bool)
+    # First wind speed at which the rating is exceeded (None if never)
+    first = np.where(over.any(axis=1), over.argmax(axis=1), -1)
+    ranked = []
+    for i in np.argsort(-pull[:, -1], kind='stable'):
+        name, design_type, area = named[i]
+        ranked.append({
+            'name': name,
+            'type': design_type,
+            'drag_area': round(area, 4),
+            'pull': [round(f, 1) for f in pull[i].tolist()],
+            'max_pull': round(float(pull[i, -1]), 1),
+            'exceeds': bool(over[i].any()),
+            'limit_wind': float(speeds[first[i]]) if first[i] >= 0 else None,
+        })
+    return ranked
+
+
+def parse_rating(value):
+    """
+    Parse a line or kite rating such as '50lb', '20 kg' or '200N' into newtons.
+    Raises ValueError for unknown units and ratings that are not positive.
+    """
+    value = str(value).strip()
+    number = value.rstrip('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ ')
+    unit = value[len(number):].strip() or 'N'
+    if unit not in FORCE_UNITS:
+        raise ValueError(f'Unknown force unit: {unit} (use {", ".join(FORCE_UNITS)})')
+    rating = float(number) * FORCE_UNITS[unit]
+    if not math.isfinite(rating) or rating <= 0:
+        raise ValueError(f'Rating must be a positive force: {value}')
+    return rating
+
+
+def main():
+    from src.db import get_latest_designs
+    parser = argparse.ArgumentParser(description='Rank saved designs by line pull over a range of wind speeds.')
+    parser.add_argument('--wind-min', type=float, default=2, help='m/s (default 2)')
+    parser.add_argument('--wind-max', type=float, default=15, help='m/s (default 15)')
+    parser.add_argument('--step', type=float, default=1, help='m/s (default 1)')
+    parser.add_argument('--rating', help="Line or kite rating, e.g. '50lb', '20kg', '200N'")
+    parser.add_argument('--project', action='append', default=[],
+                        help='Also rank a project YAML (bol, pipe, cylinder or box), repeatable')
+    args = parser.parse_args()
+
+    try:
+        speeds = wind_speeds(args.wind_min, args.wind_max, args.step)
+        rating = parse_rating(args.rating) if args.rating else None
+        projects = [(path, *project_drag_area(path)) for path in args.project]
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+    ranked = rank_designs(get_latest_designs(), speeds, rating, projects)
+    print(f'{"design":<24} {"type":<12} {"CdA m²":>8} {f"pull @ {speeds[-1]:g} m/s":>16}  rating')
+    for row in ranked:
+        flag = f'EXCEEDED from {row["limit_wind"]:g} m/s' if row['exceeds'] else ('ok' if rating else '')
+        print(f'{row["name"]:<24} {row["type"]:<12} {row["drag_area"]:>8.3f} '
+              f'{row["max_pull"]:>9.1f} N {row["max_pull"] / GRAVITY:>4.1f}kg  {flag}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,10 @@
-# Navigate to project directory and replace src/render.py
-cd /Users/ed/kite_laundry
-cat << 'EOF' > src/render.py
 import io
 import svgwrite
 from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors as rl_colors
 from reportlab.pdfgen import canvas
 import math
+from src.geometry import design_geometry
+from src.palette import get_palette
 
 def generate_svg(design_type, dimensions, colors):
     """
@@ -14,51 +12,29 @@ def generate_svg(design_type, dimensions, colors):
     Args: design_type (str), dimensions (dict), colors (list)
     Returns: io.BytesIO with SVG content
     """
-    gore = dimensions.get('gore', 8 if design_type == 'spinner' else 6)
     base_length = dimensions.get('length', 100)
     base_width = dimensions.get('width', dimensions.get('entry_diameter', 10))
     scale = 20  # Increased multiplier for large, visible designs
     viewbox_width = base_length * scale
     viewbox_height = base_width * scale
     dwg = svgwrite.Drawing(size=('100%', '100%'), viewBox=(0, 0, viewbox_width, viewbox_height))
-    primary = colors[0] if colors else 'red'
-    secondary = colors[1] if len(colors) > 1 else 'black'
-    tertiary = colors[2] if len(colors) > 2 else secondary
-    if design_type == 'tail':
-        length = dimensions['length'] * scale
-        width = dimensions['width'] * scale
-        dwg.add(dwg.rect(insert=(10, 10), size=(length, width), rx=width/2, ry=width/2, fill=primary, stroke=secondary))
-    elif design_type == 'drogue':
-        entry_dia = dimensions['entry_diameter'] * scale
-        outlet_dia = dimensions['outlet_diameter'] * scale
-        length = dimensions['length'] * scale
-        dwg.add(dwg.polygon(points=[(10, 10), (10 + length, 10 + (entry_dia - outlet_dia)/2), (10 + length, 10 + (entry_dia + outlet_dia)/2), (10, 10 + entry_dia)], fill=primary, stroke=secondary))
-        for i in range(1, gore):
-            gore_x = 10 + i * (length / gore)
-            gore_height = entry_dia - (entry_dia - outlet_dia) * (gore_x - 10) / length
-            dwg.add(dwg.line(start=(gore_x, 10 + (entry_dia - gore_height) / 2), end=(gore_x, 10 + (entry_dia - gore_height) / 2 + gore_height), stroke='black', stroke_width=1))
-    elif design_type == 'spinner':
-        entry_dia = dimensions['entry_diameter'] * scale
-        length = dimensions['length'] * scale
-        outlet_dia = 0
-        for i in range(gore):
-            start_x = 10 + i * (length / gore)
-            end_x = 10 + (i + 1) * (length / gore)
-            start_height = entry_dia - (entry_dia * i / gore)
-            end_height = entry_dia - (entry_dia * (i + 1) / gore)
-            color = colors[i % len(colors)]
-            dwg.add(dwg.polygon(points=[(start_x, 10 + (entry_dia - start_height)/2), (end_x, 10 + (entry_dia - end_height)/2), (end_x, 10 + (entry_dia + end_height)/2), (start_x, 10 + (entry_dia + start_height)/2)], fill=color, stroke=secondary))
-        dwg.add(dwg.circle(center=(10, 10 + entry_dia/2), r=entry_dia/2, fill='none', stroke=secondary, stroke_width=5))
-    elif design_type == 'graded_tail':
-        length = dimensions['length'] * scale
-        width = dimensions['width'] * scale
-        for i in range(gore):
-            start_x = 10 + i * (length / gore)
-            end_x = 10 + (i + 1) * (length / gore)
-            start_width = width - (width * 0.75 * i / gore)
-            end_width = width - (width * 0.75 * (i + 1) / gore)
-            color = colors[i % len(colors)]
-            dwg.add(dwg.polygon(points=[(start_x, 10), (end_x, 10), (end_x, 10 + end_width), (start_x, 10 + start_width)], fill=color, stroke=secondary))
+    geometry = design_geometry(design_type, dimensions, colors)
+    secondary = geometry['stroke']
+
+    def pt(x, y):
+        return (10 + x * scale, 10 + y * scale)
+
+    for panel in geometry['panels']:
+        if 'radius' in panel:
+            (x0, y0), _, (x1, y1), _ = panel['points']
+            r = panel['radius'] * scale
+            dwg.add(dwg.rect(insert=pt(x0, y0), size=((x1 - x0) * scale, (y1 - y0) * scale), rx=r, ry=r, fill=panel['fill'], stroke=secondary))
+        else:
+            dwg.add(dwg.polygon(points=[pt(x, y) for x, y in panel['points']], fill=panel['fill'], stroke=secondary))
+    for x1, y1, x2, y2 in geometry['lines']:
+        dwg.add(dwg.line(start=pt(x1, y1), end=pt(x2, y2), stroke='black', stroke_width=1))
+    for circle in geometry['circles']:
+        dwg.add(dwg.circle(center=pt(circle['cx'], circle['cy']), r=circle['r'] * scale, fill='none', stroke=secondary, stroke_width=circle['stroke_width']))
     svg_str_io = io.StringIO()
     dwg.write(svg_str_io)
     svg_bytes = svg_str_io.getvalue().encode('utf-8')
@@ -83,7 +59,8 @@ def generate_pdf(name, design_type, dimensions, colors, rod, date, unit_label):
     dims_str = ', '.join([f"{k}: {v} {unit_label}" if k != 'gore' else f"{k}: {v}" for k, v in dimensions.items()])
     c.drawString(100, y, f"Dimensions: {dims_str}")
     y -= 20
-    colors_str = ', '.join(colors)  # Match colors list structure
+    palette = get_palette()
+    colors_str = ', '.join(f'{c.name} ({c.code})' if c.code else c.name for c in map(palette.resolve, colors))
     c.drawString(100, y, f"Colors: {colors_str} (Icarex Ripstop)")
     y -= 20
     c.drawString(100, y, f"Rod: {rod.capitalize()}")
@@ -92,76 +69,25 @@ def generate_pdf(name, design_type, dimensions, colors, rod, date, unit_label):
     y -= 50
     c.drawString(100, y, "Preview:")
     y -= 200
-    primary = colors[0] if colors else 'red'
-    secondary = colors[1] if len(colors) > 1 else 'black'
-    tertiary = colors[2] if len(colors) > 2 else secondary
     scale = min(5, 400 / dimensions.get('length', 100), 400 / dimensions.get('width', dimensions.get('entry_diameter', 10)))
     x_start = 100
     y_start = y
-    if design_type == 'tail':
-        length = dimensions['length'] * scale
-        width = dimensions['width'] * scale
-        c.setFillColor(primary)
-        c.setStrokeColor(secondary)
-        c.rect(x_start, y_start, length, width, fill=1)
-    elif design_type == 'drogue':
-        entry_dia = dimensions['entry_diameter'] * scale
-        outlet_dia = dimensions['outlet_diameter'] * scale
-        length = dimensions['length'] * scale
-        c.setFillColor(primary)
-        c.setStrokeColor(secondary)
-        points = [(x_start, y_start), (x_start + length, y_start + (entry_dia - outlet_dia)/2), (x_start + length, y_start + (entry_dia + outlet_dia)/2), (x_start, y_start + entry_dia)]
+    geometry = design_geometry(design_type, dimensions, colors)
+    secondary = palette.resolve(geometry['stroke']).reportlab
+    c.setStrokeColor(secondary)
+    for panel in geometry['panels']:
+        c.setFillColor(palette.resolve(panel['fill']).reportlab)
         path = c.beginPath()
-        path.moveTo(*points[0])
-        for p in points[1:]:
-            path.lineTo(*p)
+        path.moveTo(x_start + panel['points'][0][0] * scale, y_start + panel['points'][0][1] * scale)
+        for x, y in panel['points'][1:]:
+            path.lineTo(x_start + x * scale, y_start + y * scale)
         path.close()
         c.drawPath(path, fill=1, stroke=1)
-        gore = dimensions.get('gore', 6)
-        for i in range(1, gore):
-            gore_x = x_start + i * (length / gore)
-            gore_height = entry_dia - (entry_dia - outlet_dia) * (gore_x - x_start) / length
-            c.line(gore_x, y_start + (entry_dia - gore_height) / 2, gore_x, y_start + (entry_dia - gore_height) / 2 + gore_height)
-    elif design_type == 'spinner':
-        entry_dia = dimensions['entry_diameter'] * scale
-        length = dimensions['length'] * scale
-        gore = dimensions.get('gore', 8)
-        for i in range(gore):
-            start_x = x_start + i * (length / gore)
-            end_x = x_start + (i + 1) * (length / gore)
-            start_height = entry_dia - (entry_dia * i / gore)
-            end_height = entry_dia - (entry_dia * (i + 1) / gore)
-            color = colors[i % len(colors)]
-            c.setFillColor(color)
-            c.setStrokeColor(secondary)
-            path = c.beginPath()
-            path.moveTo(start_x, y_start + (entry_dia - start_height)/2)
-            path.lineTo(end_x, y_start + (entry_dia - end_height)/2)
-            path.lineTo(end_x, y_start + (entry_dia + end_height)/2)
-            path.lineTo(start_x, y_start + (entry_dia + start_height)/2)
-            path.close()
-            c.drawPath(path, fill=1, stroke=1)
+    for x1, y1, x2, y2 in geometry['lines']:
+        c.line(x_start + x1 * scale, y_start + y1 * scale, x_start + x2 * scale, y_start + y2 * scale)
+    for circle in geometry['circles']:
         c.setStrokeColor(secondary)
-        c.setStrokeWidth(5)  # Set stroke width before drawing circle
-        c.circle(x_start, y_start + entry_dia/2, entry_dia/2, fill=0, stroke=1)
-    elif design_type == 'graded_tail':
-        length = dimensions['length'] * scale
-        width = dimensions['width'] * scale
-        gore = dimensions.get('gore', 6)
-        for i in range(gore):
-            start_x = x_start + i * (length / gore)
-            end_x = x_start + (i + 1) * (length / gore)
-            start_width = width - (width * 0.75 * i / gore)
-            end_width = width - (width * 0.75 * (i + 1) / gore)
-            color = colors[i % len(colors)]
-            c.setFillColor(color)
-            c.setStrokeColor(secondary)
-            path = c.beginPath()
-            path.moveTo(start_x, y_start)
-            path.lineTo(end_x, y_start)
-            path.lineTo(end_x, y_start + end_width)
-            path.lineTo(start_x, y_start + start_width)
-            path.close()
-            c.drawPath(path, fill=1, stroke=1)
+        c.setLineWidth(circle['stroke_width'])
+        c.circle(x_start + circle['cx'] * scale, y_start + circle['cy'] * scale, circle['r'] * scale, fill=0, stroke=1)
     c.save()
     return pdf_io
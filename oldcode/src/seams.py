@@ -0,0 +1,262 @@
+import math
+from functools import lru_cache
+import yaml
+from src.cutting import cut_panels, offset_polygon, layout_cut_job
+from src.unfold import surface_from_project, unfold_surface
+
+FABRIC_THICKNESS = 0.08  # mm per ply of ripstop
+WEBBING_THICKNESS = 1.2  # mm per ply of webbing
+STITCH_LENGTH = 2.5  # mm, lockstitch
+THREAD_WASTE = 0.15  # starts, back-tacks and bobbin changes
+HEM_WIDTH = 8  # mm finished hem, folded twice
+# Stitching per edge role: (rows, plies): felled seam, double-folded hem, patch with its edge turned under
+STITCHING = {'seam': (2, 4), 'hem': (1, 3), 'patch': (1, 3)}
+REINFORCEMENT_LENGTH = {'double_layer': 50}  # mm along the piece, band around its whole girth
+DEFAULT_REINFORCEMENT_LENGTH = 50
+# Webbing tab (width, length) mm per attachment point, box-x stitched through the reinforced fabric
+ATTACHMENT_WEBBING = {'carabiner': (25, 100), 'swivel': (25, 100), 'bridle': (15, 80)}
+DEFAULT_ATTACHMENT_WEBBING = (25, 100)
+
+
+def thread_per_mm(thickness, rows=1):
+    """
+    Lockstitch thread (needle and bobbin) per mm of stitching: each stitch runs the
+    stitch length on both sides and the threads pass through the full thickness twice.
+    Args: thickness (mm, all plies stitched through), rows (parallel rows of stitching)
+    Returns: float mm thread per mm
+    """
+    return rows * 2 * (STITCH_LENGTH + thickness) / STITCH_LENGTH
+
+
+def design_pieces(design_type, dimensions):
+    """
+    Panels of a design with the role of every edge, following cut_panels' point order.
+    Trapezoid and ring edges run side, far end, side, near end (ring ends are arcs of several edges);
+    graded tail sections run bottom, far end, top, near end.
+    Returns: list of (label, count, points (mm), roles ('seam', 'hem' or None per edge points[i] -> points[i + 1]))
+    """
+    panels = cut_panels(design_type, dimensions)
+    pieces = []
+    for i, (label, points) in enumerate(panels):
+        first, last = i == 0, i == len(panels) - 1
+        if design_type in ('tail', 'drogue'):
+            # Sides sew to the next gore (or close the tube), entry and outlet are hemmed
+            roles = ['seam', 'hem', 'seam', 'hem']
+        elif design_type == 'spinner':
+            # Rings close on themselves and sew to their neighbours; the entry is hemmed into the hoop
+            # sleeve and the last ring ends in a point (no inner arc). Arcs are chains of chords.
+            arc = (len(points) - 2) // (1 if last else 2)
+            roles = ['seam'] * (len(points) - arc) + ['hem' if first else 'seam'] * arc
+        elif design_type == 'graded_tail':
+            roles = ['hem', 'hem' if last else 'seam', 'hem', 'hem' if first else 'seam']
+        else:
+            raise ValueError(f'Unknown design type: {design_type}')
+        pieces.append((label, 1, points, roles))
+    return pieces
+
+
+def design_fittings(design_type, dimensions):
+    """
+    Default reinforcements and attachment points of a design: everything hangs from its
+    leading end, drogues from one bridle leg per gore.
+    Returns: tuple of (kind ('reinforcement' or 'attachment'), type, position (fraction of the length))
+    """
+    if design_type == 'drogue':
+        gore = dimensions.get('gore', 6)
+        return (('reinforcement', 'double_layer', 0.0),) + (('attachment', 'bridle', 0.0),) * gore
+    attachment = 'swivel' if design_type == 'spinner' else 'carabiner'
+    return (('reinforcement', 'double_layer', 0.0), ('attachment', attachment, 0.0))
+
+
+def design_girth(design_type, dimensions):
+    """
+    Distance around (or across, for flat tails) a design at a fraction of its length.
+    Returns: function fraction -> mm
+    """
+    d = {k: v * 10 for k, v in dimensions.items() if k != 'gore'}  # cm -> mm
+    if design_type == 'tail':
+        return lambda f: d['width']  # flat width is the tube's circumference
+    if design_type == 'drogue':
+        return lambda f: math.pi * (d['entry_diameter'] + (d['outlet_diameter'] - d['entry_diameter']) * f)
+    if design_type == 'spinner':
+        return lambda f: math.pi * d['entry_diameter'] * (1 - f)
+    if design_type == 'graded_tail':
+        return lambda f: d['width'] * (1 - 0.75 * f)
+    raise ValueError(f'Unknown design type: {design_type}')
+
+
+def project_fittings(parameters):
+    """Reinforcements and attachment points listed in a project's parameters (positions like '25%')."""
+    fittings = []
+    for kind, key in (('reinforcement', 'reinforcements'), ('attachment', 'attachment_points')):
+        for item in parameters.get(key) or []:
+            fittings.append((kind, item.get('type', 'double_layer' if kind == 'reinforcement' else 'carabiner'),
+                             _fraction(item.get('position', 0))))
+    return tuple(fittings)
+
+
+def _fraction(position):
+    if isinstance(position, str) and position.strip().endswith('%'):
+        value = float(position.strip()[:-1]) / 100
+    else:
+        value = float(position)
+    if not 0 <= value <= 1:
+        raise ValueError(f'Position must be within the piece (0-100%): {position}')
+    return value
+
+
+def surface_girth(kind, params):
+    """Distance around an unfolded project surface at a fraction of its length (mm)."""
+    p = dict(params)
+    if kind == 'bol':
+        return lambda f: math.pi * p['diameter'] * math.sin(f * math.pi / 2)
+    if kind == 'box':
+        return lambda f: p['sides'] * p['width']
+    return lambda f: math.pi * p['diameter']
+
+
+def seam_plan(pieces, fittings, girth, seam_allowance=10, hem_width=HEM_WIDTH):
+    """
+    Seams, hems, reinforcements and thread of an assembled piece, from its flat panels.
+    Every seam joins two panel edges, so the sewn seam length is half the seam edge length.
+    Args: pieces (list of (label, count, points mm, edge roles)), fittings (as design_fittings),
+          girth (function fraction -> mm), seam_allowance (mm), hem_width (mm, finished)
+    Returns: dict with pieces and patches (label, count, outline, allowances per edge), attachments,
+             seam_allowance, hem_width, seam_mm, hem_mm, patch_mm, webbing_mm, thread_m and fabric_m2 (cut area)
+    """
+    allowance = {'seam': seam_allowance, 'hem': 2 * hem_width, 'patch': hem_width, None: 0}
+    lengths = {'seam': 0.0, 'hem': 0.0, 'patch': 0.0}
+    fabric = 0.0
+    planned = []
+    for label, count, points, roles in pieces:
+        edges = [math.dist(points[i], points[(i + 1) % len(points)]) for i in range(len(points))]
+        for role, length in zip(roles, edges):
+            if role:
+                lengths[role] += length * count
+        allowances = [allowance[role] for role in roles]
+        fabric += abs(_area(offset_polygon(points, allowances))) * count
+        planned.append({'label': label, 'count': count, 'outline': points, 'allowances': allowances})
+    lengths['seam'] /= 2
+
+    patches, attachments = [], []
+    webbing = box_x = 0.0
+    for kind, kind_type, position in fittings:
+        if kind == 'reinforcement':
+            width = max(girth(position), 1.0)
+            length = REINFORCEMENT_LENGTH.get(kind_type, DEFAULT_REINFORCEMENT_LENGTH)
+            outline = [(0.0, 0.0), (width, 0.0), (width, length), (0.0, length)]
+            lengths['patch'] += 2 * (width + length)
+            fabric += (width + 2 * hem_width) * (length + 2 * hem_width)
+            patches.append({'label': f'{kind_type} {position:.0%}', 'count': 1, 'outline': outline,
+                            'allowances': [hem_width] * 4})
+        else:
+            tab_width, tab_length = ATTACHMENT_WEBBING.get(kind_type, DEFAULT_ATTACHMENT_WEBBING)
+            webbing += tab_length
+            box_x += (4 + 2 * math.sqrt(2)) * tab_width
+            attachments.append({'type': kind_type, 'position': position, 'webbing': (tab_width, tab_length)})
+
+    thread = sum(lengths[role] * thread_per_mm(plies * FABRIC_THICKNESS, rows)
+                 for role, (rows, plies) in STITCHING.items())
+    # Tabs: webbing folded into a loop over the reinforced fabric (doubled by its patch)
+    thread += box_x * thread_per_mm(2 * WEBBING_THICKNESS + 3 * FABRIC_THICKNESS)
+    return {
+        'pieces': planned,
+        'patches': patches,
+        'attachments': attachments,
+        'seam_allowance': seam_allowance,
+        'hem_width': hem_width,
+        'seam_mm': round(lengths['seam'], 1),
+        'hem_mm': round(lengths['hem'], 1),
+        'patch_mm': round(lengths['patch'], 1),
+        'webbing_mm': round(webbing, 1),
+        'thread_m': round(thread * (1 + THREAD_WASTE) / 1000, 2),
+        'fabric_m2': round(fabric / 1e6, 4),
+    }
+
+
+def _area(points):
+    n = len(points)
+    return sum(points[i][0] * points[(i + 1) % n][1] - points[(i + 1) % n][0] * points[i][1] for i in range(n)) / 2
+
+
+def design_seams(design_type, dimensions, seam_allowance=10, hem_width=HEM_WIDTH):
+    """
+    Seam plan of a stored design (dimensions in cm), cached per design and allowance.
+    The returned dict is shared between callers and must not be modified.
+    """
+    return _design_plan(design_type, tuple(sorted(dimensions.items())), float(seam_allowance), float(hem_width))
+
+
+@lru_cache(maxsize=512)
+def _design_plan(design_type, dimension_items, seam_allowance, hem_width):
+    dimensions = dict(dimension_items)
+    return seam_plan(design_pieces(design_type, dimensions), design_fittings(design_type, dimensions),
+                     design_girth(design_type, dimensions), seam_allowance, hem_width)
+
+
+def project_seams(path, seam_allowance=None, hem_width=HEM_WIDTH):
+    """
+    Seam plan of a project YAML, using its seam_allowance (unless given), reinforcements and attachment_points.
+    The returned dict is shared between callers and must not be modified.
+    Returns: dict as seam_plan, plus name
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    kind, params = surface_from_project(config)
+    parameters = config.get('parameters') or {}
+    if seam_allowance is None:
+        seam_allowance = parameters.get('seam_allowance', 10)
+    name = config.get('name') or (config.get('metadata') or {}).get('name', kind)
+    return _project_plan(name, kind, params, project_fittings(parameters), float(seam_allowance), float(hem_width))
+
+
+@lru_cache(maxsize=128)
+def _project_plan(name, kind, params, fittings, seam_allowance, hem_width):
+    pieces = [(panel['label'], panel['count'], panel['outline'], panel['edges'])
+              for panel in unfold_surface(kind, params)['panels']]
+    plan = seam_plan(pieces, fittings, surface_girth(kind, params), seam_allowance, hem_width)
+    plan['name'] = name
+    return plan
+
+
+def plan_cut_panels(plan, prefix=''):
+    """
+    Panels to cut for a seam plan, with their per-edge allowances, ready for layout_cut_job.
+    Returns: list of (label, points, allowances), one entry per copy
+    """
+    panels = []
+    for piece in plan['pieces'] + plan['patches']:
+        for i in range(piece['count']):
+            label = piece['label'] + (f" {i + 1}/{piece['count']}" if piece['count'] > 1 else '')
+            panels.append((f'{prefix} {label}'.strip(), piece['outline'], piece['allowances']))
+    return panels
+
+
+def build_cut_job(designs, seam_allowance=10, roll_width=1500):
+    """
+    Full-size cut job for one or more designs: panels with seam and hem allowances, plus reinforcement patches.
+    Args: designs (list of (name, design_type, dimensions)), seam_allowance (mm), roll_width (mm)
+    Returns: list of (label, cut points, sew points) in cutting order
+    """
+    panels = []
+    for name, design_type, dimensions in designs:
+        panels.extend(plan_cut_panels(design_seams(design_type, dimensions, seam_allowance), name))
+    return layout_cut_job(panels, seam_allowance, roll_width)
+
+
+def estimate_materials(plans, roll_width=1500):
+    """
+    Material estimate for a batch of orders: per item and in total, with the roll length
+    the batch takes when all panels are laid out together.
+    Args: plans (list of (name, seam plan)), roll_width (mm)
+    Returns: dict with items, totals and roll (width_mm, length_m)
+    """
+    keys = ('fabric_m2', 'seam_mm', 'hem_mm', 'patch_mm', 'webbing_mm', 'thread_m')
+    items = []
+    for name, plan in plans:
+        items.append({'name': name, **{key: plan[key] for key in keys},
+                      'reinforcements': len(plan['patches']), 'attachments': len(plan['attachments'])})
+    totals = {key: round(sum(item[key] for item in items), 4) for key in keys + ('reinforcements', 'attachments')}
+    job = layout_cut_job([p for name, plan in plans for p in plan_cut_panels(plan, name)], roll_width=roll_width)
+    length = max((y for _, cut, _ in job for _, y in cut), default=0) - min((y for _, cut, _ in job for _, y in cut), default=0)
+    return {'items': items, 'totals': totals, 'roll': {'width_mm': roll_width, 'length_m': round(length / 1000, 3)}}
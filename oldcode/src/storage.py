@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import uuid
+from flask import Flask, send_file, redirect
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # S3 backend is optional
+    boto3 = None
+    ClientError = Exception
+
+logger = logging.getLogger(__name__)
+
+# Process umask, read once: mkstemp files are 0600 and get the mode a plain open() would give
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+MIMETYPES = {
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+    'yaml': 'text/yaml',
+    'dxf': 'image/vnd.dxf',
+    'hpgl': 'application/vnd.hp-hpgl',
+}
+
+
+def artifact_key(fmt, *parts):
+    """
+    Build a content-hash key for a rendered artifact.
+    Args: fmt (str) file extension, parts (any JSON-serialisable render inputs)
+    Returns: str key like 'svg/3f/3fa4...e1.svg'
+    """
+    payload = json.dumps([fmt, *parts], sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return f'{fmt}/{digest[:2]}/{digest}.{fmt}'
+
+
+class LocalArtifactStore:
+    """Artifacts as files under a root directory, shared via a common volume."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)  # send_file would resolve a relative root against app.root_path
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data, tag=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            os.fchmod(f.fileno(), 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+
+    def serve(self, key, download_name):
+        # conditional=True gives ETag/If-None-Match and Range support
+        fmt = key.rsplit('.', 1)[-1]
+        return send_file(self._path(key), mimetype=MIMETYPES.get(fmt), download_name=download_name,
+                         conditional=True, etag=key.rsplit('/', 1)[-1])
+
+
+class S3ArtifactStore:
+    """
+    Artifacts in an S3-compatible bucket (AWS, MinIO, ...).
+    Pass client to use an existing S3 client (or a stand-in with head_object, get_object,
+    put_object and generate_presigned_url) instead of creating one with boto3.
+    """
+
+    def __init__(self, bucket, endpoint_url=None, prefix='', region=None, access_key=None, secret_key=None,
+                 url_expiry=3600, client=None):
+        if client is None and boto3 is None:
+            raise RuntimeError('S3 artifact store requires boto3 (pip install boto3)')
+        self.bucket = bucket
+        self.prefix = prefix
+        self.url_expiry = url_expiry
+        self.client = client or boto3.client('s3', endpoint_url=endpoint_url, region_name=region,
+                                             aws_access_key_id=access_key, aws_secret_access_key=secret_key)
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError:
+            return False
+
+    def get(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body'].read()
+        except ClientError:
+            return None
+
+    def put(self, key, data, tag=None):
+        fmt = key.rsplit('.', 1)[-1]
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data,
+                               ContentType=MIMETYPES.get(fmt, 'application/octet-stream'))
+
+    def serve(self, key, download_name):
+        # Hand the client a presigned URL; the object store answers Range requests itself
+        url = self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self._key(key),
+                    'ResponseContentDisposition': f'inline; filename="{download_name}"'},
+            ExpiresIn=self.url_expiry)
+        return redirect(url, code=302)
+
+
+def check_store(store):
+    """
+    Round-trip a small artifact through a store (put, exists, get, serve), e.g. against MinIO.
+    Returns: the key written
+    Raises RuntimeError naming the step that failed.
+    """
+    key = artifact_key('yaml', 'storage check', uuid.uuid4().hex)
+    data = f'check: {key}\n'.encode('utf-8')
+    store.put(key, data)
+    if not store.exists(key):
+        raise RuntimeError(f'{key} was put but does not exist')
+    stored = store.get(key)
+    if stored is None or bytes(stored) != data:
+        raise RuntimeError(f'{key} reads back different data')
+    with Flask(__name__, root_path=os.getcwd()).test_request_context():  # send_file resolves relative roots here
+        response = store.serve(key, 'check.yaml')
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f'{key} served with status {response.status_code}')
+    return key
+
+
+def get_artifact_store(config):
+    """
+    Create the artifact store configured in config (see Config.ARTIFACT_STORE).
+    Args: config (mapping) Flask app.config
+    Returns: LocalArtifactStore, S3ArtifactStore or PackArtifactStore
+    """
+    backend = config.get('ARTIFACT_STORE', 'local')
+    if backend == 'pack':
+        from src.packstore import PackArtifactStore
+        store = PackArtifactStore(config.get('ARTIFACT_PACK_DIR', 'data/packs'))
+        if config.get('ARTIFACT_PACK_COMPACT_INTERVAL'):
+            store.start_compactor(interval=config['ARTIFACT_PACK_COMPACT_INTERVAL'])
+        return store
+    if backend == 's3':
+        return S3ArtifactStore(config['ARTIFACT_S3_BUCKET'], endpoint_url=config.get('ARTIFACT_S3_ENDPOINT'),
+                               prefix=config.get('ARTIFACT_S3_PREFIX', ''), region=config.get('ARTIFACT_S3_REGION'),
+                               access_key=config.get('ARTIFACT_S3_ACCESS_KEY'),
+                               secret_key=config.get('ARTIFACT_S3_SECRET_KEY'))
+    return LocalArtifactStore(config.get('ARTIFACT_DIR', 'data/artifacts'))
+
+
+def serve_artifact(store, key, download_name, render, tag=None):
+    """
+    Serve an artifact from the store, rendering and storing it first on a miss.
+    Args: store, key (str), download_name (str), render (callable returning io.BytesIO/StringIO),
+          tag (str, optional) - a newer key stored under the same tag supersedes the old one (pack store)
+    Returns: Flask response
+    """
+    if not store.exists(key):
+        logger.debug('Artifact miss: %s', key)
+        data = render().getvalue()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        store.put(key, data, tag=tag)
+    return store.serve(key, download_name)
+
+
+def main():
+    from config import Config
+    config = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    config['ARTIFACT_PACK_COMPACT_INTERVAL'] = 0  # no compactor thread for a one-off check
+    store = get_artifact_store(config)
+    key = check_store(store)
+    print(f'{config["ARTIFACT_STORE"]} artifact store ok: {key}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import math
+from functools import lru_cache
+import numpy as np
+import yaml
+
+# Surface kinds understood from a project's geometry.type
+REVOLUTION_KINDS = ('bol', 'pipe', 'cylinder')
+BOX_KINDS = ('box',)
+
+
+def surface_from_project(config):
+    """
+    Read the surface to unfold from a project YAML (mm).
+    Args: config (dict) loaded project file, e.g. projects/line_laundry/windsock/bol.yaml
+    Returns: (kind (str), params (tuple of sorted (key, value) pairs))
+    Raises ValueError for shapes that cannot be unfolded.
+    """
+    kind = (config.get('geometry') or {}).get('type')
+    p = config.get('parameters') or {}
+    if kind == 'bol':
+        diameter = float(p['diameter'])
+        params = {'diameter': diameter, 'depth': float(p.get('depth', diameter / 2)),
+                  'gores': int(p.get('num_gores', p.get('segments', 8)))}
+    elif kind in ('pipe', 'cylinder'):
+        params = {'diameter': float(p['diameter']), 'length': float(p['length']),
+                  'gores': int(p.get('segments', p.get('num_gores', 1)))}
+    elif kind == 'box':
+        params = {'width': float(p['width']), 'cell_length': float(p['cell_length']),
+                  'cells': int(p.get('num_cells', 2)), 'sides': int(p.get('sides', 4))}
+    else:
+        raise ValueError(f'Cannot unfold geometry type: {kind}')
+    return kind, tuple(sorted(params.items()))
+
+
+def unfold_project(path, stations=65, across=17):
+    """
+    Unfold the 3D surface described by a project YAML file into flat panels.
+    Returns: dict as unfold_surface, plus name
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    kind, params = surface_from_project(config)
+    result = dict(unfold_surface(kind, params, stations, across))
+    result['name'] = config.get('name') or (config.get('metadata') or {}).get('name', kind)
+    return result
+
+
+@lru_cache(maxsize=128)
+def unfold_surface(kind, params, stations=65, across=17):
+    """
+    Mesh a surface and unfold it into flat panels (mm). Cached by parameters; the
+    returned dict is shared between callers and must not be modified.
+
+    Surfaces of revolution are cut into identical gores along meridians. Meridians
+    are geodesics, so the seam edges of each flat gore keep their true 3D length
+    (seams match when sewn); the curvature a flat panel cannot follow shows up as
+    strain inside the panel, reported as distortion. Box frames unfold exactly.
+    Args: kind (str), params (tuple of (key, value)), stations (mesh rows along the seam), across (mesh columns)
+    Returns: dict with kind, panels (label, count, outline, edges (seam/hem/None per outline edge), folds),
+             surface_area, flat_area (mm²)
+             and distortion (max_strain, rms_strain, area_error, seam_error as fractions)
+    """
+    p = dict(params)
+    if kind in BOX_KINDS:
+        return _unfold_box(p['width'], p['cell_length'], p['cells'], p['sides'])
+    if kind not in REVOLUTION_KINDS:
+        raise ValueError(f'Cannot unfold geometry type: {kind}')
+    t = np.linspace(0.0, 1.0, stations)
+    if kind == 'bol':
+        # Half ellipsoid from the pole (r=0) to the rim
+        angle = t * math.pi / 2
+        r = p['diameter'] / 2 * np.sin(angle)
+        z = p['depth'] * (1 - np.cos(angle))
+    else:
+        r = np.full_like(t, p['diameter'] / 2)
+        z = p['length'] * t
+    return _unfold_revolution(kind, r, z, p['gores'], across)
+
+
+def _unfold_revolution(kind, r, z, gores, across):
+    half = math.pi / gores
+    theta = np.linspace(-half, half, across)
+    # 3D gore mesh: rows along the meridian, columns across the gore
+    mesh = np.stack([r[:, None] * np.cos(theta), r[:, None] * np.sin(theta),
+                     np.broadcast_to(z[:, None], (len(r), across))], axis=-1)
+    ds = np.hypot(np.diff(r), np.diff(z))
+    s = np.concatenate([[0.0], np.cumsum(ds)])
+    # Flat gore: parallels unroll to straight rows of their true width; the seam edges
+    # are laid out so each step has the meridian's length (geodesic edge, no seam mismatch)
+    x = r[:, None] * theta[None, :]
+    dx_edge = np.diff(r) * half
+    y_edge = np.concatenate([[0.0], np.cumsum(np.sqrt(np.clip(ds ** 2 - dx_edge ** 2, 0, None)))])
+    blend = (theta / half) ** 2
+    y = s[:, None] + (y_edge - s)[:, None] * blend[None, :]
+    flat = np.stack([x, y], axis=-1)
+
+    distortion = _distortion(mesh, flat)
+    seam_flat = np.sum(np.hypot(np.diff(flat[:, 0, 0]), np.diff(flat[:, 0, 1])))
+    distortion['seam_error'] = float(abs(seam_flat / s[-1] - 1)) if s[-1] else 0.0
+
+    outline = np.concatenate([flat[:, 0], flat[-1, 1:], flat[-2::-1, -1], flat[0, -2:0:-1]])
+    # Role of each outline edge (point i -> i + 1): meridians are seams, the rim/ends are hemmed
+    # and the pole of a bol has no edge at all
+    stations = len(r)
+    start = None if kind == 'bol' else 'hem'
+    edges = (['seam'] * (stations - 1) + ['hem'] * (across - 1)
+             + ['seam'] * (stations - 1) + [start] * (across - 1))
+    keep = np.concatenate([[True], np.any(np.abs(np.diff(outline, axis=0)) > 1e-6, axis=1)])
+    # A dropped duplicate point takes the zero-length edge leading to it along
+    edges = [role for i, role in enumerate(edges) if keep[(i + 1) % len(keep)]]
+    outline = [(round(px, 2), round(py, 2)) for px, py in outline[keep].tolist()]
+    if len(outline) > 1 and outline[0] == outline[-1]:
+        outline.pop()
+        edges.pop()
+    label = 'segment' if kind in ('pipe', 'cylinder') else 'gore'
+    return {
+        'kind': kind,
+        'panels': [{'label': label, 'count': gores, 'outline': outline, 'edges': edges, 'folds': []}],
+        'surface_area': distortion.pop('surface_area') * gores,
+        'flat_area': distortion.pop('flat_area') * gores,
+        'distortion': distortion,
+    }
+
+
+def _distortion(mesh, flat):
+    """Edge strain and area change between a 3D mesh (m, k, 3) and its flat layout (m, k, 2)."""
+    ratios = []
+    for a, b in ((np.s_[1:, :], np.s_[:-1, :]), (np.s_[:, 1:], np.s_[:, :-1]), (np.s_[1:, 1:], np.s_[:-1, :-1])):
+        length_3d = np.linalg.norm(mesh[a] - mesh[b], axis=-1)
+        length_2d = np.linalg.norm(flat[a] - flat[b], axis=-1)
+        valid = length_3d > 1e-9
+        ratios.append(length_2d[valid] / length_3d[valid] - 1)
+    strain = np.abs(np.concatenate(ratios))
+    # Each mesh quad as two triangles
+    p00, p01, p10, p11 = mesh[:-1, :-1], mesh[:-1, 1:], mesh[1:, :-1], mesh[1:, 1:]
+    f00, f01, f10, f11 = flat[:-1, :-1], flat[:-1, 1:], flat[1:, :-1], flat[1:, 1:]
+    area_3d = (np.linalg.norm(np.cross(p01 - p00, p11 - p00), axis=-1)
+               + np.linalg.norm(np.cross(p11 - p00, p10 - p00), axis=-1)).sum() / 2
+    area_2d = (np.abs(_cross2(f01 - f00, f11 - f00)) + np.abs(_cross2(f11 - f00, f10 - f00))).sum() / 2
+    return {
+        'max_strain': float(strain.max()) if strain.size else 0.0,
+        'rms_strain': float(np.sqrt(np.mean(strain ** 2))) if strain.size else 0.0,
+        'area_error': float(area_2d / area_3d - 1) if area_3d else 0.0,
+        'surface_area': float(area_3d),
+        'flat_area': float(area_2d),
+    }
+
+
+def _cross2(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def _unfold_box(width, cell_length, cells, sides):
+    # Each cell's sail is one band wrapped around the longerons: developable, so exact
+    band = sides * width
+    area = band * cell_length * cells
+    return {
+        'kind': 'box',
+        'panels': [{'label': 'cell sail', 'count': cells,
+                    'outline': [(0.0, 0.0), (band, 0.0), (band, cell_length), (0.0, cell_length)],
+                    'edges': ['hem', 'seam', 'hem', 'seam'],
+                    'folds': [((i * width, 0.0), (i * width, cell_length)) for i in range(1, sides)]}],
+        'surface_area': area,
+        'flat_area': area,
+        'distortion': {'max_strain': 0.0, 'rms_strain': 0.0, 'area_error': 0.0, 'seam_error': 0.0},
+    }
@@ -10,7 +10,148 @@ class PatternVisualizer {
         this.container.innerHTML = '';
         const svg = this.createSVG();
         this.container.appendChild(svg);
-        this.drawPattern();
+        if (this.pattern.panels) {
+            this.drawGeometry();
+            this.enableZoomPan(svg);
+        } else {
+            this.drawPattern();
+        }
+    }
+
+    // Fetch packed Float32 geometry from /geometry?format=f32 and render it client-side.
+    // The browser revalidates with the ETag, so unchanged designs cost a 304.
+    static async load(containerId, name) {
+        const response = await fetch(`/geometry?name=${encodeURIComponent(name)}&format=f32`);
+        if (!response.ok) {
+            throw new Error(`Geometry request failed: ${response.status}`);
+        }
+        return new PatternVisualizer(containerId, PatternVisualizer.decodeGeometry(await response.arrayBuffer()));
+    }
+
+    // Layout: 'KLG1', uint32 meta length, meta JSON, then float32 panel vertices, lines and circles.
+    static decodeGeometry(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'KLG1') {
+            throw new Error('Not a kite laundry geometry payload');
+        }
+        const metaLength = view.getUint32(4, true);
+        const meta = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, metaLength)).replace(/\0+$/, ''));
+        const floats = new Float32Array(buffer, 8 + metaLength);
+        let offset = 0;
+        const panels = meta.counts.map((count, i) => {
+            const points = floats.subarray(offset, offset + count * 2);
+            offset += count * 2;
+            return { points: points, fill: meta.fills[i], radius: meta.radii[i] };
+        });
+        const lines = floats.subarray(offset, offset + meta.lines * 4);
+        offset += meta.lines * 4;
+        const circles = floats.subarray(offset, offset + meta.circles * 3);
+        return { width: meta.width, height: meta.height, stroke: meta.stroke, panels: panels, lines: lines, circles: circles };
+    }
+
+    // Expand the quantized JSON form (/geometry?format=json, /preview) into the shape drawGeometry expects.
+    static fromQuantized(q) {
+        const scale = (values) => Float32Array.from(values, (v) => v * q.q);
+        return {
+            width: q.w * q.q,
+            height: q.h * q.q,
+            stroke: q.s,
+            panels: q.p.map((panel) => ({ points: scale(panel.v), fill: panel.f, radius: (panel.r || 0) * q.q })),
+            lines: scale(q.l),
+            circles: scale(q.c.flat()),
+        };
+    }
+
+    drawGeometry() {
+        const svg = this.container.querySelector('svg');
+        const ns = 'http://www.w3.org/2000/svg';
+        const geometry = this.pattern;
+        const margin = Math.max(geometry.width, geometry.height) * 0.02;
+        this.viewBox = { x: -margin, y: -margin, w: geometry.width + 2 * margin, h: geometry.height + 2 * margin };
+        svg.setAttribute('preserveAspectRatio', 'xMidYMid meet');
+        this.applyViewBox(svg);
+        const group = document.createElementNS(ns, 'g');
+        group.setAttribute('stroke', geometry.stroke);
+        group.setAttribute('vector-effect', 'non-scaling-stroke');
+        geometry.panels.forEach((panel) => {
+            let shape;
+            if (panel.radius) {
+                shape = document.createElementNS(ns, 'rect');
+                shape.setAttribute('x', panel.points[0]);
+                shape.setAttribute('y', panel.points[1]);
+                shape.setAttribute('width', panel.points[4] - panel.points[0]);
+                shape.setAttribute('height', panel.points[5] - panel.points[1]);
+                shape.setAttribute('rx', panel.radius);
+            } else {
+                shape = document.createElementNS(ns, 'polygon');
+                shape.setAttribute('points', Array.from(panel.points).join(' '));
+            }
+            shape.setAttribute('fill', panel.fill);
+            shape.setAttribute('vector-effect', 'non-scaling-stroke');
+            group.appendChild(shape);
+        });
+        for (let i = 0; i < geometry.lines.length; i += 4) {
+            const line = document.createElementNS(ns, 'line');
+            line.setAttribute('x1', geometry.lines[i]);
+            line.setAttribute('y1', geometry.lines[i + 1]);
+            line.setAttribute('x2', geometry.lines[i + 2]);
+            line.setAttribute('y2', geometry.lines[i + 3]);
+            line.setAttribute('stroke', 'black');
+            line.setAttribute('vector-effect', 'non-scaling-stroke');
+            group.appendChild(line);
+        }
+        for (let i = 0; i < geometry.circles.length; i += 3) {
+            const circle = document.createElementNS(ns, 'circle');
+            circle.setAttribute('cx', geometry.circles[i]);
+            circle.setAttribute('cy', geometry.circles[i + 1]);
+            circle.setAttribute('r', geometry.circles[i + 2]);
+            circle.setAttribute('fill', 'none');
+            circle.setAttribute('stroke-width', '3');
+            circle.setAttribute('vector-effect', 'non-scaling-stroke');
+            group.appendChild(circle);
+        }
+        svg.appendChild(group);
+    }
+
+    applyViewBox(svg) {
+        svg.setAttribute('viewBox', `${this.viewBox.x} ${this.viewBox.y} ${this.viewBox.w} ${this.viewBox.h}`);
+    }
+
+    // Wheel zooms around the cursor, drag pans; both only touch the viewBox, nothing is re-fetched.
+    enableZoomPan(svg) {
+        svg.addEventListener('wheel', (event) => {
+            event.preventDefault();
+            const rect = svg.getBoundingClientRect();
+            const factor = event.deltaY > 0 ? 1.15 : 1 / 1.15;
+            const fx = (event.clientX - rect.left) / rect.width;
+            const fy = (event.clientY - rect.top) / rect.height;
+            const w = this.viewBox.w * factor;
+            const h = this.viewBox.h * factor;
+            this.viewBox.x += (this.viewBox.w - w) * fx;
+            this.viewBox.y += (this.viewBox.h - h) * fy;
+            this.viewBox.w = w;
+            this.viewBox.h = h;
+            this.applyViewBox(svg);
+        }, { passive: false });
+        let drag = null;
+        svg.addEventListener('pointerdown', (event) => {
+            drag = { x: event.clientX, y: event.clientY };
+            svg.setPointerCapture(event.pointerId);
+        });
+        svg.addEventListener('pointermove', (event) => {
+            if (!drag) {
+                return;
+            }
+            const rect = svg.getBoundingClientRect();
+            const scale = Math.max(this.viewBox.w / rect.width, this.viewBox.h / rect.height);
+            this.viewBox.x -= (event.clientX - drag.x) * scale;
+            this.viewBox.y -= (event.clientY - drag.y) * scale;
+            drag = { x: event.clientX, y: event.clientY };
+            this.applyViewBox(svg);
+        });
+        svg.addEventListener('pointerup', () => { drag = null; });
+        svg.addEventListener('dblclick', () => this.init());
     }
 
     createSVG() {